@@ -5,105 +5,132 @@ import discord
 from discord.ext import commands
 import asyncio
 import logging
-import traceback
-from typing import Optional
-import sys
-import os
+import time
+from typing import Dict, Optional, Tuple
+import redis.asyncio as redis
 
-# Add parent directory to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
-from config import settings
+from config import get_settings, create_directories
 from utils.logger import setup_logging
 from utils.database import DatabaseManager
+from utils.cache import VMCache
+from discord_bot.checks import on_app_command_error
 from proxmox.proxmox_client import ProxmoxClient
-from discord_bot.cogs.vm_management import VMManagementCog
-from discord_bot.cogs.node_management import NodeManagementCog
-from discord_bot.cogs.backup_management import BackupManagementCog
-from discord_bot.cogs.monitoring import MonitoringCog
-from discord_bot.cogs.template_management import TemplateManagementCog
-from discord_bot.cogs.user_management import UserManagementCog
-from discord_bot.cogs.system_management import SystemManagementCog
-from discord_bot.cogs.console_access import ConsoleAccessCog
-from discord_bot.cogs.migration import MigrationCog
-from discord_bot.cogs.snapshots import SnapshotCog
-from discord_bot.cogs.networking import NetworkingCog
 
 # Setup logging
 logger = setup_logging()
 
+# Permission decisions are cached per user for this many seconds
+PERMISSION_CACHE_TTL = 60
+PERMISSION_CACHE_SIZE = 1024
+
+# Cog extensions, imported only when the bot loads them
+EXTENSIONS = [
+    "discord_bot.cogs.vm_management",
+    "discord_bot.cogs.node_management",
+    "discord_bot.cogs.backup_management",
+    "discord_bot.cogs.monitoring",
+    "discord_bot.cogs.template_management",
+    "discord_bot.cogs.user_management",
+    "discord_bot.cogs.system_management",
+    "discord_bot.cogs.console_access",
+    "discord_bot.cogs.migration",
+    "discord_bot.cogs.snapshots",
+    "discord_bot.cogs.networking"
+]
+
 class VPSDeployerBot(commands.Bot):
     """Advanced VPS Deployer Discord Bot"""
     
     def __init__(self):
+        self.settings = get_settings()
+        
         intents = discord.Intents.default()
         intents.message_content = True
         intents.members = True
         intents.guilds = True
         
         super().__init__(
-            command_prefix=settings.bot_prefix,
+            command_prefix=self.settings.bot_prefix,
             intents=intents,
             help_command=None,
             case_insensitive=True
         )
+        # Permission check failures from every cog are answered in one place
+        self.tree.error(on_app_command_error)
         
         self.database = None
         self.proxmox = None
+        self.redis = None
+        self.vm_cache = None
         self.start_time = None
+        self._init_task = None
+        self._permission_cache: Dict[int, Tuple[float, bool]] = {}
         
     async def setup_hook(self):
         """Setup hook called when bot is starting"""
         logger.info("Setting up VPS Deployer Bot...")
         
-        # Initialize database
-        self.database = DatabaseManager()
-        await self.database.initialize()
-        
-        # Initialize Proxmox client
-        self.proxmox = ProxmoxClient(
-            host=settings.proxmox_host,
-            user=settings.proxmox_user,
-            password=settings.proxmox_password,
-            realm=settings.proxmox_realm,
-            verify_ssl=settings.proxmox_verify_ssl
-        )
+        # Create runtime directories
+        create_directories()
         
-        # Load cogs
-        await self.load_cogs()
+        # Run the slow initialization in the background so the gateway
+        # handshake and heartbeats are not held up by it
+        self._init_task = asyncio.create_task(self._background_init())
         
-        # Sync slash commands
-        if settings.discord_guild_id:
-            guild = discord.Object(id=settings.discord_guild_id)
-            self.tree.copy_global_to(guild=guild)
-            await self.tree.sync(guild=guild)
-        else:
-            await self.tree.sync()
+    async def _background_init(self):
+        """Initialize services, load cogs and sync slash commands"""
+        try:
+            # Initialize database
+            self.database = DatabaseManager()
+            await self.database.initialize()
+            
+            # Initialize Proxmox client
+            self.proxmox = ProxmoxClient(
+                host=self.settings.proxmox_host,
+                user=self.settings.proxmox_user,
+                password=self.settings.proxmox_password,
+                realm=self.settings.proxmox_realm,
+                verify_ssl=self.settings.proxmox_verify_ssl
+            )
+            await self.proxmox.connect()
+            
+            # Initialize Redis-backed caches
+            self.redis = redis.from_url(self.settings.redis_url)
+            self.vm_cache = VMCache(self.redis, self.database, self.proxmox)
+            
+            # Load cogs
+            await self.load_cogs()
+            
+            # Sync slash commands
+            if self.settings.discord_guild_id:
+                guild = discord.Object(id=self.settings.discord_guild_id)
+                self.tree.copy_global_to(guild=guild)
+                await self.tree.sync(guild=guild)
+            else:
+                await self.tree.sync()
+                
+            logger.info("Bot setup completed")
+            
+        except Exception as e:
+            # Don't stay online without services or commands
+            logger.exception(f"Bot setup failed, shutting down: {e}")
+            await self.close()
             
-        logger.info("Bot setup completed")
-        
     async def load_cogs(self):
         """Load all bot cogs"""
-        cogs = [
-            VMManagementCog,
-            NodeManagementCog,
-            BackupManagementCog,
-            MonitoringCog,
-            TemplateManagementCog,
-            UserManagementCog,
-            SystemManagementCog,
-            ConsoleAccessCog,
-            MigrationCog,
-            SnapshotCog,
-            NetworkingCog
-        ]
-        
-        for cog in cogs:
+        async def _load(extension):
             try:
-                await self.add_cog(cog(self))
-                logger.info(f"Loaded cog: {cog.__name__}")
+                await self.load_extension(extension)
+                logger.info(f"Loaded cog: {extension}")
             except Exception as e:
-                logger.error(f"Failed to load cog {cog.__name__}: {e}")
+                logger.error(f"Failed to load cog {extension}: {e}")
+                
+        await asyncio.gather(*(_load(extension) for extension in EXTENSIONS))
                 
     async def on_ready(self):
         """Called when bot is ready"""
@@ -119,6 +146,11 @@ class VPSDeployerBot(commands.Bot):
         )
         await self.change_presence(activity=activity)
         
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        """Forget cached permission decisions when a member's roles change"""
+        if before.roles != after.roles:
+            self._permission_cache.pop(after.id, None)
+            
     async def on_command_error(self, ctx, error):
         """Handle command errors"""
         if isinstance(error, commands.CommandNotFound):
@@ -141,57 +173,70 @@ class VPSDeployerBot(commands.Bot):
             return
             
         # Log unexpected errors
-        logger.error(f"Unexpected error in command {ctx.command}: {error}")
-        logger.error(traceback.format_exc())
+        # The error is dispatched outside its except block, so pass it explicitly
+        logger.error(f"Unexpected error in command {ctx.command}: {error}", exc_info=error)
         
         await ctx.send("❌ An unexpected error occurred. Please try again later.")
         
     async def on_error(self, event, *args, **kwargs):
         """Handle general errors"""
-        logger.error(f"Error in event {event}: {traceback.format_exc()}")
+        logger.exception(f"Error in event {event}")
         
     async def close(self):
         """Cleanup when bot is shutting down"""
         logger.info("Shutting down bot...")
         
+        # A failed initialization closes the bot from inside its own task
+        if self._init_task and not self._init_task.done() and self._init_task is not asyncio.current_task():
+            self._init_task.cancel()
+            
         if self.proxmox:
             await self.proxmox.disconnect()
             
         if self.database:
             await self.database.close()
             
+        if self.redis:
+            await self.redis.aclose()
+            
         await super().close()
         
     def is_admin(self, user_id: int) -> bool:
         """Check if user is admin"""
-        return user_id in settings.admin_user_ids
+        return user_id in self.settings.admin_user_ids
         
     def has_permission(self, user: discord.Member) -> bool:
         """Check if user has permission to use bot commands"""
-        if self.is_admin(user.id):
-            return True
+        now = time.monotonic()
+        cached = self._permission_cache.get(user.id)
+        if cached and cached[0] > now:
+            return cached[1]
             
-        # Check for allowed roles
-        for role_name in settings.allowed_roles:
-            if any(role.name == role_name for role in user.roles):
-                return True
-                
-        return False
-
-# Bot instance
-bot = VPSDeployerBot()
+        allowed = self.is_admin(user.id) or not self.settings.allowed_roles.isdisjoint(
+            role.name for role in getattr(user, "roles", ())
+        )
+        
+        if len(self._permission_cache) >= PERMISSION_CACHE_SIZE:
+            # Drop the oldest entry (dicts keep insertion order)
+            self._permission_cache.pop(next(iter(self._permission_cache)))
+        self._permission_cache[user.id] = (now + PERMISSION_CACHE_TTL, allowed)
+        return allowed
 
 async def main():
     """Main function to run the bot"""
+    # Built here rather than at import, so settings are only read when the bot runs
+    bot = VPSDeployerBot()
+    
     try:
-        await bot.start(settings.discord_token)
+        await bot.start(bot.settings.discord_token)
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
     except Exception as e:
-        logger.error(f"Bot crashed: {e}")
-        logger.error(traceback.format_exc())
+        logger.exception(f"Bot crashed: {e}")
     finally:
         await bot.close()
 
 if __name__ == "__main__":
+    if uvloop is not None:
+        uvloop.install()
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,29 @@
+"""
+Shared app command checks for VPS Deployer Discord Bot
+"""
+import discord
+from discord import app_commands
+import logging
+
+logger = logging.getLogger(__name__)
+
+class MissingBotPermission(app_commands.CheckFailure):
+    """Raised when a user may not use the bot's commands"""
+
+def require_permission(action: str):
+    """Reject users without bot permission before the command runs or defers"""
+    def predicate(interaction: discord.Interaction) -> bool:
+        if interaction.client.has_permission(interaction.user):
+            return True
+        raise MissingBotPermission(f"❌ You don't have permission to {action}.")
+        
+    return app_commands.check(predicate)
+
+async def on_app_command_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
+    """Tell users rejected by a permission check why, and log any other app command error"""
+    if isinstance(error, MissingBotPermission):
+        await interaction.response.send_message(str(error), ephemeral=True)
+        return
+        
+    command = interaction.command.name if interaction.command else None
+    logger.error(f"Unexpected error in app command {command}: {error}", exc_info=error)
@@ -5,19 +5,100 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import asyncio
+import heapq
 import logging
-from typing import Optional, List, Dict, Any
-from datetime import datetime, timedelta
-import json
+from typing import Optional, List, Dict, Any, Tuple
+from datetime import datetime, timedelta, timezone
+
+from discord_bot.embeds import BYTES_TO_GB, new_embed
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of backups deleted at once by backup_cleanup
+CLEANUP_CONCURRENCY = 8
+
+# Prebuilt embed payloads for the status replies
+_BACKUP_CREATED_TEMPLATE = {"title": "✅ Backup Created", "color": 0x00ff00}
+_BACKUP_RESTORE_TEMPLATE = {"title": "✅ Backup Restore Started", "color": 0x00ff00}
+_BACKUP_DELETED_TEMPLATE = {"title": "✅ Backup Deleted", "color": 0xff0000}
+_BACKUP_SCHEDULED_TEMPLATE = {"title": "✅ Backup Schedule Created", "color": 0x00ff00}
+_BACKUP_UNSCHEDULED_TEMPLATE = {"title": "✅ Backup Schedule Removed", "color": 0xff9900}
+_BACKUP_CLEANUP_TEMPLATE = {"title": "✅ Backup Cleanup Completed", "color": 0x00ff00}
+
+def _status_embed(template: Dict[str, Any], fields: List[Tuple[str, str]]) -> discord.Embed:
+    """Build a status reply from a prebuilt payload and inline (name, value) fields"""
+    return new_embed(template, fields=[{"name": name, "value": value, "inline": True} for name, value in fields])
+
+# The backup_list delete menu stops accepting selections after this many seconds
+DELETE_MENU_TIMEOUT = 60
+
+class BackupDeleteView(discord.ui.View):
+    """Follow-up menu for deleting one of the listed backups"""
+    
+    def __init__(self, cog: "BackupManagementCog", user_id: int, vmid: int, vm: Dict[str, Any], backups: List[Dict[str, Any]]):
+        super().__init__(timeout=DELETE_MENU_TIMEOUT)
+        # The view lives in memory only, so the owner check made by backup_list
+        # holds for its lifetime and ends with its timeout
+        self.cog = cog
+        self.user_id = user_id
+        self.vmid = vmid
+        self.vm = vm
+        
+        # Select option values are limited to 100 characters
+        options = [
+            discord.SelectOption(label=backup["volid"], value=backup["volid"])
+            for backup in backups if 0 < len(backup.get("volid", "")) <= 100
+        ]
+        self.select = discord.ui.Select(placeholder="Delete a backup...", options=options)
+        self.select.callback = self.delete_selected
+        if options:
+            self.add_item(self.select)
+            
+    async def delete_selected(self, interaction: discord.Interaction):
+        """Delete the selected backup and take it off the menu"""
+        if interaction.user.id != self.user_id:
+            await interaction.response.send_message("❌ This isn't your confirmation. Run /backup_list to manage your own backups.", ephemeral=True)
+            return
+            
+        await interaction.response.defer()
+        
+        backup_name = interaction.data["values"][0]
+        try:
+            embed = await self.cog._delete_backup(self.vm, self.vmid, backup_name)
+            
+            # Deleted backups can't be picked again; drop the menu once it is empty
+            self.select.options = [option for option in self.select.options if option.value != backup_name]
+            if not self.select.options:
+                self.remove_item(self.select)
+                self.stop()
+            await interaction.edit_original_response(view=self)
+            
+            await interaction.followup.send(embed=embed)
+            
+        except Exception as e:
+            logger.error(f"Error deleting backup: {e}")
+            await interaction.followup.send(f"❌ Failed to delete backup: {str(e)}")
+
 class BackupManagementCog(commands.Cog):
     """Backup Management commands"""
     
     def __init__(self, bot):
         self.bot = bot
         
+    async def _delete_backup(self, vm: Dict[str, Any], vmid: int, backup_name: str) -> discord.Embed:
+        """Delete a backup from Proxmox and the database"""
+        await self.bot.proxmox.delete_backup(vm["node"], backup_name)
+        
+        # Remove from database
+        await self.bot.database.delete_backup(backup_name)
+        await self.bot.vm_cache.invalidate_backups(vm["node"], vmid)
+        
+        return _status_embed(_BACKUP_DELETED_TEMPLATE, [
+            ("VM", f"{vm['name']} (ID: {vmid})"),
+            ("Backup", backup_name),
+            ("Status", "Deleted")
+        ])
+        
     @app_commands.command(name="backup_create", description="Create a backup of a virtual machine")
     @app_commands.describe(
         vmid="VM ID to backup",
@@ -43,7 +124,7 @@ class BackupManagementCog(commands.Cog):
                 return
                 
             # Check if user owns this VM
-            vm = await self.bot.database.get_vm_by_id(vmid)
+            vm = await self.bot.vm_cache.get_vm(vmid)
             if not vm or vm["owner_id"] != interaction.user.id:
                 await interaction.followup.send("❌ VM not found or you don't own it.")
                 return
@@ -76,18 +157,16 @@ class BackupManagementCog(commands.Cog):
             }
             
             await self.bot.database.create_backup(backup_data)
+            await self.bot.vm_cache.invalidate_backups(vm["node"], vmid)
             
-            embed = discord.Embed(
-                title="✅ Backup Created",
-                color=0x00ff00,
-                timestamp=datetime.utcnow()
-            )
-            embed.add_field(name="VM", value=f"{vm['name']} (ID: {vmid})", inline=True)
-            embed.add_field(name="Backup Name", value=backup_name, inline=True)
-            embed.add_field(name="Mode", value=mode, inline=True)
-            embed.add_field(name="Compression", value=compression, inline=True)
-            embed.add_field(name="Status", value="In Progress", inline=True)
-            embed.add_field(name="Node", value=vm["node"], inline=True)
+            embed = _status_embed(_BACKUP_CREATED_TEMPLATE, [
+                ("VM", f"{vm['name']} (ID: {vmid})"),
+                ("Backup Name", backup_name),
+                ("Mode", mode),
+                ("Compression", compression),
+                ("Status", "In Progress"),
+                ("Node", vm["node"])
+            ])
             
             await interaction.followup.send(embed=embed)
             
@@ -108,13 +187,13 @@ class BackupManagementCog(commands.Cog):
                 return
                 
             # Check if user owns this VM
-            vm = await self.bot.database.get_vm_by_id(vmid)
+            vm = await self.bot.vm_cache.get_vm(vmid)
             if not vm or vm["owner_id"] != interaction.user.id:
                 await interaction.followup.send("❌ VM not found or you don't own it.")
                 return
                 
             # Get backups from Proxmox
-            backups = await self.bot.proxmox.get_backups(vm["node"], vmid)
+            backups = await self.bot.vm_cache.get_backups(vm["node"], vmid)
             
             if not backups:
                 await interaction.followup.send("📝 No backups found for this VM.")
@@ -123,17 +202,17 @@ class BackupManagementCog(commands.Cog):
             embed = discord.Embed(
                 title=f"💾 Backups: {vm['name']}",
                 color=0x0099ff,
-                timestamp=datetime.utcnow()
+                timestamp=datetime.now(timezone.utc)
             )
             
             for backup in backups[:10]:  # Limit to 10 backups
                 backup_name = backup.get("volid", "Unknown")
-                backup_size = backup.get("size", 0) / 1024 / 1024 / 1024  # GB
+                backup_size = backup.get("size", 0) * BYTES_TO_GB
                 backup_format = backup.get("format", "Unknown")
                 backup_ctime = backup.get("ctime", 0)
                 
                 # Convert timestamp to readable date
-                backup_date = datetime.fromtimestamp(backup_ctime).strftime("%Y-%m-%d %H:%M:%S")
+                backup_date = datetime.fromtimestamp(backup_ctime).isoformat(sep=" ", timespec="seconds")
                 
                 embed.add_field(
                     name=backup_name,
@@ -146,7 +225,9 @@ class BackupManagementCog(commands.Cog):
             if len(backups) > 10:
                 embed.set_footer(text=f"Showing 10 of {len(backups)} backups")
                 
-            await interaction.followup.send(embed=embed)
+            # Ownership is verified, so the follow-up menu may delete this VM's backups
+            view = BackupDeleteView(self, interaction.user.id, vmid, vm, backups[:10])
+            await interaction.followup.send(embed=embed, view=view)
             
         except Exception as e:
             logger.error(f"Error listing backups: {e}")
@@ -173,16 +254,15 @@ class BackupManagementCog(commands.Cog):
                 return
                 
             # Check if user owns this VM
-            vm = await self.bot.database.get_vm_by_id(vmid)
+            vm = await self.bot.vm_cache.get_vm(vmid)
             if not vm or vm["owner_id"] != interaction.user.id:
                 await interaction.followup.send("❌ VM not found or you don't own it.")
                 return
                 
             # Check if backup exists
-            backups = await self.bot.proxmox.get_backups(vm["node"], vmid)
-            backup_exists = any(backup.get("volid") == backup_name for backup in backups)
+            backup_volids = await self.bot.vm_cache.get_backup_volids(vm["node"], vmid)
             
-            if not backup_exists:
+            if backup_name not in backup_volids:
                 await interaction.followup.send(f"❌ Backup '{backup_name}' not found.")
                 return
                 
@@ -195,15 +275,12 @@ class BackupManagementCog(commands.Cog):
             
             result = await self.bot.proxmox.restore_backup(vm["node"], backup_name, restore_config)
             
-            embed = discord.Embed(
-                title="✅ Backup Restore Started",
-                color=0x00ff00,
-                timestamp=datetime.utcnow()
-            )
-            embed.add_field(name="VM", value=f"{vm['name']} (ID: {vmid})", inline=True)
-            embed.add_field(name="Backup", value=backup_name, inline=True)
-            embed.add_field(name="Status", value="Restoring...", inline=True)
-            embed.add_field(name="Node", value=vm["node"], inline=True)
+            embed = _status_embed(_BACKUP_RESTORE_TEMPLATE, [
+                ("VM", f"{vm['name']} (ID: {vmid})"),
+                ("Backup", backup_name),
+                ("Status", "Restoring..."),
+                ("Node", vm["node"])
+            ])
             
             await interaction.followup.send(embed=embed)
             
@@ -232,33 +309,20 @@ class BackupManagementCog(commands.Cog):
                 return
                 
             # Check if user owns this VM
-            vm = await self.bot.database.get_vm_by_id(vmid)
+            vm = await self.bot.vm_cache.get_vm(vmid)
             if not vm or vm["owner_id"] != interaction.user.id:
                 await interaction.followup.send("❌ VM not found or you don't own it.")
                 return
                 
             # Check if backup exists
-            backups = await self.bot.proxmox.get_backups(vm["node"], vmid)
-            backup_exists = any(backup.get("volid") == backup_name for backup in backups)
+            backup_volids = await self.bot.vm_cache.get_backup_volids(vm["node"], vmid)
             
-            if not backup_exists:
+            if backup_name not in backup_volids:
                 await interaction.followup.send(f"❌ Backup '{backup_name}' not found.")
                 return
                 
             # Delete backup
-            result = await self.bot.proxmox.delete_backup(vm["node"], backup_name)
-            
-            # Remove from database
-            await self.bot.database.delete_backup(backup_name)
-            
-            embed = discord.Embed(
-                title="✅ Backup Deleted",
-                color=0xff0000,
-                timestamp=datetime.utcnow()
-            )
-            embed.add_field(name="VM", value=f"{vm['name']} (ID: {vmid})", inline=True)
-            embed.add_field(name="Backup", value=backup_name, inline=True)
-            embed.add_field(name="Status", value="Deleted", inline=True)
+            embed = await self._delete_backup(vm, vmid, backup_name)
             
             await interaction.followup.send(embed=embed)
             
@@ -291,7 +355,7 @@ class BackupManagementCog(commands.Cog):
                 return
                 
             # Check if user owns this VM
-            vm = await self.bot.database.get_vm_by_id(vmid)
+            vm = await self.bot.vm_cache.get_vm(vmid)
             if not vm or vm["owner_id"] != interaction.user.id:
                 await interaction.followup.send("❌ VM not found or you don't own it.")
                 return
@@ -310,16 +374,13 @@ class BackupManagementCog(commands.Cog):
             # Store schedule in database
             await self.bot.database.create_backup_schedule(vmid, schedule_config)
             
-            embed = discord.Embed(
-                title="✅ Backup Schedule Created",
-                color=0x00ff00,
-                timestamp=datetime.utcnow()
-            )
-            embed.add_field(name="VM", value=f"{vm['name']} (ID: {vmid})", inline=True)
-            embed.add_field(name="Schedule", value=schedule, inline=True)
-            embed.add_field(name="Retention", value=f"{retention} backups", inline=True)
-            embed.add_field(name="Compression", value=compression, inline=True)
-            embed.add_field(name="Status", value="Active", inline=True)
+            embed = _status_embed(_BACKUP_SCHEDULED_TEMPLATE, [
+                ("VM", f"{vm['name']} (ID: {vmid})"),
+                ("Schedule", schedule),
+                ("Retention", f"{retention} backups"),
+                ("Compression", compression),
+                ("Status", "Active")
+            ])
             
             await interaction.followup.send(embed=embed)
             
@@ -340,7 +401,7 @@ class BackupManagementCog(commands.Cog):
                 return
                 
             # Check if user owns this VM
-            vm = await self.bot.database.get_vm_by_id(vmid)
+            vm = await self.bot.vm_cache.get_vm(vmid)
             if not vm or vm["owner_id"] != interaction.user.id:
                 await interaction.followup.send("❌ VM not found or you don't own it.")
                 return
@@ -348,13 +409,10 @@ class BackupManagementCog(commands.Cog):
             # Remove backup schedule
             await self.bot.database.delete_backup_schedule(vmid)
             
-            embed = discord.Embed(
-                title="✅ Backup Schedule Removed",
-                color=0xff9900,
-                timestamp=datetime.utcnow()
-            )
-            embed.add_field(name="VM", value=f"{vm['name']} (ID: {vmid})", inline=True)
-            embed.add_field(name="Status", value="Schedule Removed", inline=True)
+            embed = _status_embed(_BACKUP_UNSCHEDULED_TEMPLATE, [
+                ("VM", f"{vm['name']} (ID: {vmid})"),
+                ("Status", "Schedule Removed")
+            ])
             
             await interaction.followup.send(embed=embed)
             
@@ -375,7 +433,7 @@ class BackupManagementCog(commands.Cog):
                 return
                 
             # Check if user owns this VM
-            vm = await self.bot.database.get_vm_by_id(vmid)
+            vm = await self.bot.vm_cache.get_vm(vmid)
             if not vm or vm["owner_id"] != interaction.user.id:
                 await interaction.followup.send("❌ VM not found or you don't own it.")
                 return
@@ -389,33 +447,39 @@ class BackupManagementCog(commands.Cog):
             retention = schedule.get("retention", 7)
             
             # Get all backups
-            backups = await self.bot.proxmox.get_backups(vm["node"], vmid)
+            backups = await self.bot.vm_cache.get_backups(vm["node"], vmid)
             
             if len(backups) <= retention:
                 await interaction.followup.send("📝 No backups to clean up.")
                 return
                 
-            # Sort backups by creation time (newest first)
-            backups.sort(key=lambda x: x.get("ctime", 0), reverse=True)
-            
-            # Delete old backups
-            deleted_count = 0
-            for backup in backups[retention:]:
-                try:
-                    await self.bot.proxmox.delete_backup(vm["node"], backup["volid"])
-                    await self.bot.database.delete_backup(backup["volid"])
-                    deleted_count += 1
-                except Exception as e:
-                    logger.warning(f"Failed to delete backup {backup['volid']}: {e}")
-                    
-            embed = discord.Embed(
-                title="✅ Backup Cleanup Completed",
-                color=0x00ff00,
-                timestamp=datetime.utcnow()
-            )
-            embed.add_field(name="VM", value=f"{vm['name']} (ID: {vmid})", inline=True)
-            embed.add_field(name="Retention Policy", value=f"{retention} backups", inline=True)
-            embed.add_field(name="Deleted", value=f"{deleted_count} old backups", inline=True)
+            # Keep the newest backups without sorting the whole listing
+            keep = heapq.nlargest(retention, backups, key=lambda x: x.get("ctime", 0))
+            keep_volids = {backup["volid"] for backup in keep}
+            expired = [backup for backup in backups if backup["volid"] not in keep_volids]
+            
+            # Delete old backups concurrently, bounded to respect Proxmox rate limits
+            semaphore = asyncio.Semaphore(CLEANUP_CONCURRENCY)
+            
+            async def _delete(backup) -> int:
+                async with semaphore:
+                    try:
+                        await self.bot.proxmox.delete_backup(vm["node"], backup["volid"])
+                        await self.bot.database.delete_backup(backup["volid"])
+                        return 1
+                    except Exception as e:
+                        logger.warning(f"Failed to delete backup {backup['volid']}: {e}")
+                        return 0
+                        
+            deleted_count = sum(await asyncio.gather(*(_delete(backup) for backup in expired)))
+            
+            await self.bot.vm_cache.invalidate_backups(vm["node"], vmid)
+            
+            embed = _status_embed(_BACKUP_CLEANUP_TEMPLATE, [
+                ("VM", f"{vm['name']} (ID: {vmid})"),
+                ("Retention Policy", f"{retention} backups"),
+                ("Deleted", f"{deleted_count} old backups")
+            ])
             
             await interaction.followup.send(embed=embed)
             
@@ -5,109 +5,486 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import asyncio
+import io
 import logging
-from typing import Optional, List, Dict, Any
-from datetime import datetime, timedelta
+import time
+from collections import defaultdict
+from itertools import islice
+from typing import Optional, List, Dict, Any, Tuple, Callable
 import json
 
+from discord_bot.checks import require_permission
+from discord_bot.embeds import BYTES_TO_GB, BYTES_TO_MB, build_embed, build_embeds, send_embeds
+
 logger = logging.getLogger(__name__)
 
+# Maximum number of concurrent VM stats requests against Proxmox
+VM_STATS_CONCURRENCY = 16
+
+# Message templates for status fields, alerts and health issues
+_FMT_NODE_STATUS = "**VMs:** {}/{} running\n**CPU:** {:.1f}%\n**Memory:** {:.1f}GB / {:.1f}GB".format
+_FMT_HIGH_CPU = "High CPU usage: {:.1f}%".format
+_FMT_HIGH_MEMORY = "High memory usage: {:.1f}%".format
+_FMT_VM_HIGH_CPU_ALERT = "VM {} high CPU usage: {:.1f}%".format
+_FMT_VM_HIGH_MEMORY_ALERT = "VM {} high memory usage: {:.1f}%".format
+_FMT_VM_HIGH_CPU_ISSUE = "VM {} high CPU: {:.1f}%".format
+_FMT_VM_HIGH_MEMORY_ISSUE = "VM {} high memory: {:.1f}%".format
+
+# Embed descriptions are capped at 4096 characters by Discord
+MAX_LOGS_DESCRIPTION = 4000
+
+# Maximum number of alerts shown by monitor_alerts
+MAX_DISPLAYED_ALERTS = 10
+
+# Seconds between background samples of node and VM stats
+SAMPLE_INTERVAL = 10
+
+# The sampler starts with the first monitoring command and stops once no
+# command has used its snapshots for this many seconds
+SAMPLER_IDLE_TIMEOUT = 300
+
+# Snapshots older than this are considered stale and re-sampled on demand
+SNAPSHOT_MAX_AGE = 3 * SAMPLE_INTERVAL
+
+# Clusters with more nodes than this have their embeds built in a worker thread;
+# node fields are spread over several embeds well before this size
+THREAD_OFFLOAD_MIN_NODES = 32
+
+class VMUsage:
+    """Stats and usage percentages of one running VM"""
+    
+    __slots__ = ("vm", "stats", "cpu", "memory_percent")
+    
+    def __init__(self, vm: Dict[str, Any], stats: Any, cpu: float, memory_percent: float):
+        self.vm = vm
+        self.stats = stats
+        self.cpu = cpu
+        self.memory_percent = memory_percent
+
+class MonitorSnapshot:
+    """Node and running VM data from one monitoring sample"""
+    
+    __slots__ = ("ts", "nodes", "results", "vm_stats")
+    
+    def __init__(self, ts: float, nodes: List[Dict[str, Any]], results: List[Any], vm_stats: Dict[str, List[VMUsage]]):
+        self.ts = ts
+        self.nodes = nodes
+        self.results = results
+        self.vm_stats = vm_stats
+
+def _format_node_logs(node_name: str, logs: Any) -> str:
+    """Render a node's logs, or the error fetching them, as a description block"""
+    if isinstance(logs, Exception):
+        logger.warning(f"Failed to get logs for node {node_name}: {logs!r}")
+        return f"**📋 {node_name}**\nError: {str(logs)}\n"
+        
+    if not logs:
+        return f"**📋 {node_name}**\nNo logs available\n"
+        
+    log_text = "\n".join(islice(logs, 10))  # Limit to 10 lines per node
+    if len(logs) > 10:
+        log_text += f"\n... and {len(logs) - 10} more lines"
+    return f"**📋 {node_name}**\n```\n{log_text}\n```\n"
+
+def _node_error_field(node_name: str) -> Dict[str, Any]:
+    """Embed field for a node whose status could not be fetched"""
+    return {
+        "name": f"🔴 {node_name}",
+        "value": "**Status:** Error\n**Details:** Unable to fetch status",
+        "inline": True
+    }
+
+def _usage_percentages(stats_list: List[Any]) -> Tuple[List[float], List[float]]:
+    """Compute CPU and memory usage percentages for a batch of VM stats"""
+    stats_list = [stats if isinstance(stats, dict) else {} for stats in stats_list]
+    
+    cpu_usage = [stats.get("cpu", 0) * 100 for stats in stats_list]
+    memory_usage = [
+        stats.get("mem", 0) / stats["maxmem"] * 100 if stats.get("maxmem", 0) > 0 else 0
+        for stats in stats_list
+    ]
+    return cpu_usage, memory_usage
+
+def _build_status_embeds(nodes: List[Dict[str, Any]], results: List[Any]) -> List[discord.Embed]:
+    """Build the monitor_status embeds from fetched node data"""
+    fields = []
+    
+    total_vms = 0
+    running_vms = 0
+    total_memory = 0
+    used_memory = 0
+    total_cpu = 0
+    used_cpu = 0
+    
+    for node, result in zip(nodes, results):
+        # Failed nodes come back as exception objects; report them without re-raising
+        if isinstance(result, Exception):
+            logger.warning(f"Failed to get status for node {node['node']}: {result!r}")
+            fields.append(_node_error_field(node["node"]))
+            continue
+            
+        try:
+            status, resources, vms = result
+            
+            # Count VMs
+            node_vms = len(vms)
+            node_running = sum(1 for vm in vms if vm.get("status") == "running")
+            total_vms += node_vms
+            running_vms += node_running
+            
+            # Calculate resources
+            if resources:
+                node_cpu = resources.get("cpu", 0) * 100
+                node_memory = resources.get("mem", 0) * BYTES_TO_GB
+                node_max_memory = resources.get("maxmem", 0) * BYTES_TO_GB
+                
+                total_cpu += 100  # Assume 100% per node
+                used_cpu += node_cpu
+                total_memory += node_max_memory
+                used_memory += node_memory
+            
+            # Add node info to embed
+            status_emoji = "🟢" if status.get("status") == "online" else "🔴"
+            fields.append({
+                "name": f"{status_emoji} {node['node']}",
+                "value": _FMT_NODE_STATUS(node_running, node_vms, node_cpu, node_memory, node_max_memory),
+                "inline": True
+            })
+            
+        except Exception as e:
+            logger.warning(f"Failed to get status for node {node['node']}: {e}")
+            fields.append(_node_error_field(node["node"]))
+    
+    # Overall stats
+    overall_cpu = (used_cpu / total_cpu * 100) if total_cpu > 0 else 0
+    overall_memory = (used_memory / total_memory * 100) if total_memory > 0 else 0
+    
+    fields.append({
+        "name": "📈 Overall Statistics",
+        "value": f"**Total VMs:** {running_vms}/{total_vms} running\n"
+                 f"**CPU Usage:** {overall_cpu:.1f}%\n"
+                 f"**Memory Usage:** {overall_memory:.1f}%",
+        "inline": False
+    })
+    
+    return build_embeds("📊 System Status", 0x0099ff, fields)
+
+def _build_alerts_embeds(nodes: List[Dict[str, Any]], results: List[Any], vm_stats_by_node: Dict[str, List[VMUsage]]) -> List[discord.Embed]:
+    """Build the monitor_alerts embed from fetched node and VM data; displayed alerts always fit one embed"""
+    # Only the first alerts are displayed; the rest are just counted
+    alerts = []
+    alert_count = 0
+    
+    def add_alert(alert: Dict[str, str]):
+        nonlocal alert_count
+        alert_count += 1
+        if len(alerts) < MAX_DISPLAYED_ALERTS:
+            alerts.append(alert)
+            
+    def add_node_failure(node_name: str, error: Exception):
+        logger.warning(f"Failed to check alerts for node {node_name}: {error!r}")
+        add_alert({
+            "type": "error",
+            "node": node_name,
+            "message": f"Failed to check node status: {str(error)}"
+        })
+        
+    for node, result in zip(nodes, results):
+        # Failed nodes come back as exception objects; report them without re-raising
+        if isinstance(result, Exception):
+            add_node_failure(node["node"], result)
+            continue
+            
+        try:
+            status, resources, vms = result
+            
+            # Check for alerts
+            # Fast-fail offline nodes; there is nothing else to check on them
+            if status.get("status") != "online":
+                add_alert({
+                    "type": "error",
+                    "node": node["node"],
+                    "message": f"Node is {status.get('status', 'unknown')}"
+                })
+                continue
+                
+            if resources:
+                cpu_usage = resources.get("cpu", 0) * 100
+                memory_usage = resources.get("mem", 0) * BYTES_TO_GB
+                memory_total = resources.get("maxmem", 0) * BYTES_TO_GB
+                memory_percent = (memory_usage / memory_total * 100) if memory_total > 0 else 0
+                
+                if cpu_usage > 90:
+                    add_alert({
+                        "type": "warning",
+                        "node": node["node"],
+                        "message": _FMT_HIGH_CPU(cpu_usage)
+                    })
+                
+                if memory_percent > 90:
+                    add_alert({
+                        "type": "warning",
+                        "node": node["node"],
+                        "message": _FMT_HIGH_MEMORY(memory_percent)
+                    })
+            
+            # Check VMs on this node
+            for usage in vm_stats_by_node[node["node"]]:
+                if isinstance(usage.stats, Exception):
+                    logger.warning(f"Failed to get stats for VM {usage.vm['vmid']}: {usage.stats!r}")
+                    continue
+                if usage.stats:
+                    if usage.cpu > 95:
+                        add_alert({
+                            "type": "warning",
+                            "node": node["node"],
+                            "message": _FMT_VM_HIGH_CPU_ALERT(usage.vm["name"], usage.cpu)
+                        })
+                    
+                    if usage.memory_percent > 95:
+                        add_alert({
+                            "type": "warning",
+                            "node": node["node"],
+                            "message": _FMT_VM_HIGH_MEMORY_ALERT(usage.vm["name"], usage.memory_percent)
+                        })
+            
+        except Exception as e:
+            add_node_failure(node["node"], e)
+    
+    # Create embed
+    if not alerts:
+        embed = discord.Embed(
+            title="✅ No Alerts",
+            description="All systems are running normally.",
+            color=0x00ff00,
+            timestamp=discord.utils.utcnow()
+        )
+    else:
+        fields = [
+            {
+                "name": f"{'🔴' if alert['type'] == 'error' else '⚠️'} {alert['node']}",
+                "value": alert["message"],
+                "inline": False
+            }
+            for alert in alerts
+        ]
+        embed = build_embed("⚠️ System Alerts", 0xff9900, fields)
+        
+        if alert_count > len(alerts):
+            embed.set_footer(text=f"Showing {len(alerts)} of {alert_count} alerts")
+    return [embed]
+
+def _build_health_embeds(nodes: List[Dict[str, Any]], results: List[Any], vm_stats_by_node: Dict[str, List[VMUsage]]) -> List[discord.Embed]:
+    """Build the monitor_health embeds from fetched node and VM data"""
+    health_checks = []
+    
+    def add_node_failure(node_name: str, error: Exception):
+        logger.warning(f"Failed to check health for node {node_name}: {error!r}")
+        health_checks.append({
+            "node": node_name,
+            "status": "error",
+            "issues": [f"Health check failed: {str(error)}"]
+        })
+        
+    for node, result in zip(nodes, results):
+        # Failed nodes come back as exception objects; report them without re-raising
+        if isinstance(result, Exception):
+            add_node_failure(node["node"], result)
+            continue
+            
+        try:
+            status, resources, vms = result
+            
+            # Check node health
+            node_health = {
+                "node": node["node"],
+                "status": "healthy",
+                "issues": []
+            }
+            
+            # Fast-fail offline nodes; there is nothing else to check on them
+            if status.get("status") != "online":
+                node_health["status"] = "unhealthy"
+                node_health["issues"].append(f"Node is {status.get('status', 'unknown')}")
+                health_checks.append(node_health)
+                continue
+                
+            if resources:
+                cpu_usage = resources.get("cpu", 0) * 100
+                memory_usage = resources.get("mem", 0) * BYTES_TO_GB
+                memory_total = resources.get("maxmem", 0) * BYTES_TO_GB
+                memory_percent = (memory_usage / memory_total * 100) if memory_total > 0 else 0
+                
+                if cpu_usage > 80:
+                    node_health["issues"].append(_FMT_HIGH_CPU(cpu_usage))
+                    if cpu_usage > 95:
+                        node_health["status"] = "unhealthy"
+                
+                if memory_percent > 80:
+                    node_health["issues"].append(_FMT_HIGH_MEMORY(memory_percent))
+                    if memory_percent > 95:
+                        node_health["status"] = "unhealthy"
+            
+            # Check VMs
+            for usage in vm_stats_by_node[node["node"]]:
+                if isinstance(usage.stats, Exception):
+                    logger.warning(f"Failed to check VM {usage.vm['vmid']} health: {usage.stats!r}")
+                    continue
+                if usage.stats:
+                    if usage.cpu > 90:
+                        node_health["issues"].append(_FMT_VM_HIGH_CPU_ISSUE(usage.vm["name"], usage.cpu))
+                    
+                    if usage.memory_percent > 90:
+                        node_health["issues"].append(_FMT_VM_HIGH_MEMORY_ISSUE(usage.vm["name"], usage.memory_percent))
+            
+            health_checks.append(node_health)
+            
+        except Exception as e:
+            add_node_failure(node["node"], e)
+    
+    # Create embed
+    fields = []
+    
+    healthy_nodes = 0
+    unhealthy_nodes = 0
+    error_nodes = 0
+    
+    for health in health_checks:
+        if health["status"] == "healthy":
+            healthy_nodes += 1
+            status_emoji = "✅"
+        elif health["status"] == "unhealthy":
+            unhealthy_nodes += 1
+            status_emoji = "⚠️"
+        else:
+            error_nodes += 1
+            status_emoji = "❌"
+        
+        issues_text = "\n".join(health["issues"][:3]) if health["issues"] else "No issues"
+        if len(health["issues"]) > 3:
+            issues_text += f"\n... and {len(health['issues']) - 3} more issues"
+        
+        fields.append({
+            "name": f"{status_emoji} {health['node']}",
+            "value": issues_text,
+            "inline": True
+        })
+    
+    # Summary
+    fields.append({
+        "name": "📊 Summary",
+        "value": f"**Healthy:** {healthy_nodes}\n"
+                 f"**Unhealthy:** {unhealthy_nodes}\n"
+                 f"**Errors:** {error_nodes}",
+        "inline": False
+    })
+    
+    return build_embeds("🏥 Health Check Report", 0x0099ff, fields)
+
+async def _render_embeds(builder: Callable[..., List[discord.Embed]], nodes: List[Dict[str, Any]], *args: Any) -> List[discord.Embed]:
+    """Run an embed builder inline, or in a worker thread for large clusters"""
+    if len(nodes) > THREAD_OFFLOAD_MIN_NODES:
+        return await asyncio.to_thread(builder, nodes, *args)
+    return builder(nodes, *args)
+
 class MonitoringCog(commands.Cog):
     """Monitoring commands"""
     
     def __init__(self, bot):
         self.bot = bot
+        self._snapshot: Optional[MonitorSnapshot] = None
+        self._sampler: Optional[asyncio.Task] = None
+        self._last_used = 0.0
+        
+    async def cog_unload(self):
+        """Stop the background stats sampler"""
+        if self._sampler:
+            self._sampler.cancel()
+            
+    async def _sample_loop(self):
+        """Refresh the monitoring snapshot every SAMPLE_INTERVAL seconds while commands use it"""
+        while time.monotonic() - self._last_used < SAMPLER_IDLE_TIMEOUT:
+            await asyncio.sleep(SAMPLE_INTERVAL)
+            try:
+                await self._sample()
+            except Exception as e:
+                logger.warning(f"Monitoring sample failed: {e!r}")
+                
+    async def _sample(self) -> MonitorSnapshot:
+        """Poll all nodes and running VMs once and store the result as the latest snapshot"""
+        nodes = await self.bot.proxmox.get_nodes()
+        results = await self._fetch_nodes(nodes)
+        
+        # Fetch stats of every running VM in the cluster at once
+        vm_stats_by_node = await self._fetch_running_vm_stats(nodes, results)
+        
+        self._snapshot = MonitorSnapshot(time.monotonic(), nodes, results, vm_stats_by_node)
+        return self._snapshot
+        
+    async def _get_snapshot(self) -> MonitorSnapshot:
+        """Return the latest snapshot, sampling first if there is none or it is stale"""
+        self._last_used = time.monotonic()
+        snapshot = self._snapshot
+        if snapshot is None or self._last_used - snapshot.ts > SNAPSHOT_MAX_AGE:
+            snapshot = await self._sample()
+            
+        # Keep sampling in the background while monitoring commands are in use
+        if self._sampler is None or self._sampler.done():
+            self._sampler = asyncio.create_task(self._sample_loop())
+        return snapshot
+        
+    async def _fetch_nodes(self, nodes: List[Dict[str, Any]]) -> List[Any]:
+        """Fetch status, resources and VMs of every node concurrently"""
+        async def fetch(node):
+            return await asyncio.gather(
+                self.bot.proxmox.get_node_status(node["node"]),
+                self.bot.proxmox.get_node_resources(node["node"]),
+                self.bot.proxmox.get_vms(node["node"])
+            )
+            
+        return await asyncio.gather(*(fetch(node) for node in nodes), return_exceptions=True)
+        
+    async def _fetch_running_vm_stats(self, nodes: List[Dict[str, Any]], results: List[Any]) -> Dict[str, List[VMUsage]]:
+        """Fetch stats and usage percentages of every running VM, grouped by node"""
+        # Offline nodes are skipped; their VM stats requests would only fail or time out
+        running = [
+            (node["node"], vm)
+            for node, result in zip(nodes, results)
+            if not isinstance(result, Exception) and result[0].get("status") == "online"
+            for vm in result[2] if vm.get("status") == "running"
+        ]
+        
+        semaphore = asyncio.Semaphore(VM_STATS_CONCURRENCY)
+        
+        async def fetch(node_name, vmid):
+            async with semaphore:
+                return await self.bot.proxmox.get_vm_stats(node_name, vmid)
+                
+        stats = await asyncio.gather(*(fetch(node_name, vm["vmid"]) for node_name, vm in running), return_exceptions=True)
+        
+        cpu_usage, memory_usage = _usage_percentages(stats)
+        
+        stats_by_node = defaultdict(list)
+        for (node_name, vm), vm_stats, vm_cpu, vm_memory_percent in zip(running, stats, cpu_usage, memory_usage):
+            stats_by_node[node_name].append(VMUsage(vm, vm_stats, vm_cpu, vm_memory_percent))
+        return stats_by_node
         
     @app_commands.command(name="monitor_status", description="Get overall system status")
+    @require_permission("view system status")
     async def monitor_status(self, interaction: discord.Interaction):
         """Get overall system status"""
         await interaction.response.defer()
         
         try:
-            # Check permissions
-            if not self.bot.has_permission(interaction.user):
-                await interaction.followup.send("❌ You don't have permission to view system status.")
-                return
-                
-            # Get all nodes
-            nodes = await self.bot.proxmox.get_nodes()
+            # Read the latest sampled node data
+            snapshot = await self._get_snapshot()
             
-            if not nodes:
+            if not snapshot.nodes:
                 await interaction.followup.send("❌ No nodes found.")
                 return
                 
-            embed = discord.Embed(
-                title="📊 System Status",
-                color=0x0099ff,
-                timestamp=datetime.utcnow()
-            )
-            
-            total_vms = 0
-            running_vms = 0
-            total_memory = 0
-            used_memory = 0
-            total_cpu = 0
-            used_cpu = 0
-            
-            for node in nodes:
-                try:
-                    # Get node status
-                    status = await self.bot.proxmox.get_node_status(node["node"])
-                    
-                    # Get node resources
-                    resources = await self.bot.proxmox.get_node_resources(node["node"])
-                    
-                    # Get VMs on this node
-                    vms = await self.bot.proxmox.get_vms(node["node"])
-                    
-                    # Count VMs
-                    node_vms = len(vms)
-                    node_running = len([vm for vm in vms if vm.get("status") == "running"])
-                    total_vms += node_vms
-                    running_vms += node_running
-                    
-                    # Calculate resources
-                    if resources:
-                        node_cpu = resources.get("cpu", 0) * 100
-                        node_memory = resources.get("mem", 0) / 1024 / 1024 / 1024  # GB
-                        node_max_memory = resources.get("maxmem", 0) / 1024 / 1024 / 1024  # GB
-                        
-                        total_cpu += 100  # Assume 100% per node
-                        used_cpu += node_cpu
-                        total_memory += node_max_memory
-                        used_memory += node_memory
-                    
-                    # Add node info to embed
-                    status_emoji = "🟢" if status.get("status") == "online" else "🔴"
-                    embed.add_field(
-                        name=f"{status_emoji} {node['node']}",
-                        value=f"**VMs:** {node_running}/{node_vms} running\n"
-                              f"**CPU:** {node_cpu:.1f}%\n"
-                              f"**Memory:** {node_memory:.1f}GB / {node_max_memory:.1f}GB",
-                        inline=True
-                    )
-                    
-                except Exception as e:
-                    logger.warning(f"Failed to get status for node {node['node']}: {e}")
-                    embed.add_field(
-                        name=f"🔴 {node['node']}",
-                        value="**Status:** Error\n**Details:** Unable to fetch status",
-                        inline=True
-                    )
-            
-            # Overall stats
-            overall_cpu = (used_cpu / total_cpu * 100) if total_cpu > 0 else 0
-            overall_memory = (used_memory / total_memory * 100) if total_memory > 0 else 0
-            
-            embed.add_field(
-                name="📈 Overall Statistics",
-                value=f"**Total VMs:** {running_vms}/{total_vms} running\n"
-                      f"**CPU Usage:** {overall_cpu:.1f}%\n"
-                      f"**Memory Usage:** {overall_memory:.1f}%",
-                inline=False
-            )
-            
-            await interaction.followup.send(embed=embed)
+            embeds = await _render_embeds(_build_status_embeds, snapshot.nodes, snapshot.results)
+            await send_embeds(interaction, embeds)
             
         except Exception as e:
             logger.error(f"Error getting system status: {e}")
@@ -115,32 +492,28 @@ class MonitoringCog(commands.Cog):
             
     @app_commands.command(name="monitor_vm", description="Monitor a specific virtual machine")
     @app_commands.describe(vmid="VM ID to monitor")
+    @require_permission("monitor VMs")
     async def monitor_vm(self, interaction: discord.Interaction, vmid: int):
         """Monitor a specific virtual machine"""
         await interaction.response.defer()
         
         try:
-            # Check permissions
-            if not self.bot.has_permission(interaction.user):
-                await interaction.followup.send("❌ You don't have permission to monitor VMs.")
-                return
-                
             # Check if user owns this VM
-            vm = await self.bot.database.get_vm_by_id(vmid)
+            vm = await self.bot.vm_cache.get_vm(vmid)
             if not vm or vm["owner_id"] != interaction.user.id:
                 await interaction.followup.send("❌ VM not found or you don't own it.")
                 return
                 
-            # Get VM status
-            status = await self.bot.proxmox.get_vm_status(vm["node"], vmid)
-            
-            # Get VM statistics
-            stats = await self.bot.proxmox.get_vm_stats(vm["node"], vmid)
+            # Get VM status and statistics concurrently
+            status, stats = await asyncio.gather(
+                self.bot.proxmox.get_vm_status(vm["node"], vmid),
+                self.bot.proxmox.get_vm_stats(vm["node"], vmid)
+            )
             
             embed = discord.Embed(
                 title=f"📊 VM Monitor: {vm['name']}",
                 color=0x0099ff,
-                timestamp=datetime.utcnow()
+                timestamp=discord.utils.utcnow()
             )
             
             # Basic info
@@ -149,11 +522,11 @@ class MonitoringCog(commands.Cog):
             embed.add_field(name="Node", value=vm["node"], inline=True)
             
             # Uptime
-            if status.get("uptime"):
-                uptime_seconds = status["uptime"]
-                uptime_days = uptime_seconds // 86400
-                uptime_hours = (uptime_seconds % 86400) // 3600
-                uptime_minutes = (uptime_seconds % 3600) // 60
+            uptime_seconds = status.get("uptime")
+            if uptime_seconds:
+                uptime_days, remainder = divmod(uptime_seconds, 86400)
+                uptime_hours, remainder = divmod(remainder, 3600)
+                uptime_minutes = remainder // 60
                 embed.add_field(
                     name="Uptime",
                     value=f"{uptime_days}d {uptime_hours}h {uptime_minutes}m",
@@ -163,8 +536,8 @@ class MonitoringCog(commands.Cog):
             # Resource usage
             if stats:
                 cpu_usage = stats.get("cpu", 0) * 100
-                memory_usage = stats.get("mem", 0) / 1024 / 1024 / 1024  # GB
-                memory_total = stats.get("maxmem", 0) / 1024 / 1024 / 1024  # GB
+                memory_usage = stats.get("mem", 0) * BYTES_TO_GB
+                memory_total = stats.get("maxmem", 0) * BYTES_TO_GB
                 memory_percent = (memory_usage / memory_total * 100) if memory_total > 0 else 0
                 
                 embed.add_field(name="CPU Usage", value=f"{cpu_usage:.1f}%", inline=True)
@@ -175,14 +548,14 @@ class MonitoringCog(commands.Cog):
                 )
                 
                 # Network stats
-                net_in = stats.get("netin", 0) / 1024 / 1024  # MB
-                net_out = stats.get("netout", 0) / 1024 / 1024  # MB
+                net_in = stats.get("netin", 0) * BYTES_TO_MB
+                net_out = stats.get("netout", 0) * BYTES_TO_MB
                 embed.add_field(name="Network In", value=f"{net_in:.1f} MB", inline=True)
                 embed.add_field(name="Network Out", value=f"{net_out:.1f} MB", inline=True)
                 
                 # Disk stats
-                disk_read = stats.get("diskread", 0) / 1024 / 1024  # MB
-                disk_write = stats.get("diskwrite", 0) / 1024 / 1024  # MB
+                disk_read = stats.get("diskread", 0) * BYTES_TO_MB
+                disk_write = stats.get("diskwrite", 0) * BYTES_TO_MB
                 embed.add_field(name="Disk Read", value=f"{disk_read:.1f} MB", inline=True)
                 embed.add_field(name="Disk Write", value=f"{disk_write:.1f} MB", inline=True)
             
@@ -193,119 +566,17 @@ class MonitoringCog(commands.Cog):
             await interaction.followup.send(f"❌ Failed to monitor VM: {str(e)}")
             
     @app_commands.command(name="monitor_alerts", description="Get system alerts and warnings")
+    @require_permission("view alerts")
     async def monitor_alerts(self, interaction: discord.Interaction):
         """Get system alerts and warnings"""
         await interaction.response.defer()
         
         try:
-            # Check permissions
-            if not self.bot.has_permission(interaction.user):
-                await interaction.followup.send("❌ You don't have permission to view alerts.")
-                return
-                
-            alerts = []
-            
-            # Check all nodes
-            nodes = await self.bot.proxmox.get_nodes()
-            for node in nodes:
-                try:
-                    # Get node status
-                    status = await self.bot.proxmox.get_node_status(node["node"])
-                    
-                    # Get node resources
-                    resources = await self.bot.proxmox.get_node_resources(node["node"])
-                    
-                    # Check for alerts
-                    if status.get("status") != "online":
-                        alerts.append({
-                            "type": "error",
-                            "node": node["node"],
-                            "message": f"Node is {status.get('status', 'unknown')}"
-                        })
-                    
-                    if resources:
-                        cpu_usage = resources.get("cpu", 0) * 100
-                        memory_usage = resources.get("mem", 0) / 1024 / 1024 / 1024  # GB
-                        memory_total = resources.get("maxmem", 0) / 1024 / 1024 / 1024  # GB
-                        memory_percent = (memory_usage / memory_total * 100) if memory_total > 0 else 0
-                        
-                        if cpu_usage > 90:
-                            alerts.append({
-                                "type": "warning",
-                                "node": node["node"],
-                                "message": f"High CPU usage: {cpu_usage:.1f}%"
-                            })
-                        
-                        if memory_percent > 90:
-                            alerts.append({
-                                "type": "warning",
-                                "node": node["node"],
-                                "message": f"High memory usage: {memory_percent:.1f}%"
-                            })
-                    
-                    # Check VMs on this node
-                    vms = await self.bot.proxmox.get_vms(node["node"])
-                    for vm in vms:
-                        if vm.get("status") == "running":
-                            try:
-                                vm_stats = await self.bot.proxmox.get_vm_stats(node["node"], vm["vmid"])
-                                if vm_stats:
-                                    vm_cpu = vm_stats.get("cpu", 0) * 100
-                                    vm_memory = vm_stats.get("mem", 0) / 1024 / 1024 / 1024  # GB
-                                    vm_max_memory = vm_stats.get("maxmem", 0) / 1024 / 1024 / 1024  # GB
-                                    vm_memory_percent = (vm_memory / vm_max_memory * 100) if vm_max_memory > 0 else 0
-                                    
-                                    if vm_cpu > 95:
-                                        alerts.append({
-                                            "type": "warning",
-                                            "node": node["node"],
-                                            "message": f"VM {vm['name']} high CPU usage: {vm_cpu:.1f}%"
-                                        })
-                                    
-                                    if vm_memory_percent > 95:
-                                        alerts.append({
-                                            "type": "warning",
-                                            "node": node["node"],
-                                            "message": f"VM {vm['name']} high memory usage: {vm_memory_percent:.1f}%"
-                                        })
-                            except Exception as e:
-                                logger.warning(f"Failed to get stats for VM {vm['vmid']}: {e}")
-                    
-                except Exception as e:
-                    logger.warning(f"Failed to check alerts for node {node['node']}: {e}")
-                    alerts.append({
-                        "type": "error",
-                        "node": node["node"],
-                        "message": f"Failed to check node status: {str(e)}"
-                    })
+            # Check all nodes using the latest sampled data
+            snapshot = await self._get_snapshot()
             
-            # Create embed
-            if not alerts:
-                embed = discord.Embed(
-                    title="✅ No Alerts",
-                    description="All systems are running normally.",
-                    color=0x00ff00,
-                    timestamp=datetime.utcnow()
-                )
-            else:
-                embed = discord.Embed(
-                    title="⚠️ System Alerts",
-                    color=0xff9900,
-                    timestamp=datetime.utcnow()
-                )
-                
-                for alert in alerts[:10]:  # Limit to 10 alerts
-                    alert_emoji = "🔴" if alert["type"] == "error" else "⚠️"
-                    embed.add_field(
-                        name=f"{alert_emoji} {alert['node']}",
-                        value=alert["message"],
-                        inline=False
-                    )
-                
-                if len(alerts) > 10:
-                    embed.set_footer(text=f"Showing 10 of {len(alerts)} alerts")
-            
-            await interaction.followup.send(embed=embed)
+            embeds = await _render_embeds(_build_alerts_embeds, snapshot.nodes, snapshot.results, snapshot.vm_stats)
+            await send_embeds(interaction, embeds)
             
         except Exception as e:
             logger.error(f"Error getting alerts: {e}")
@@ -316,6 +587,7 @@ class MonitoringCog(commands.Cog):
         node="Node to get logs from (optional)",
         lines="Number of log lines to show (default: 50)"
     )
+    @require_permission("view logs")
     async def monitor_logs(
         self,
         interaction: discord.Interaction,
@@ -326,11 +598,6 @@ class MonitoringCog(commands.Cog):
         await interaction.response.defer()
         
         try:
-            # Check permissions
-            if not self.bot.has_permission(interaction.user):
-                await interaction.followup.send("❌ You don't have permission to view logs.")
-                return
-                
             # Get nodes
             if node:
                 nodes = [{"node": node}]
@@ -344,38 +611,21 @@ class MonitoringCog(commands.Cog):
             embed = discord.Embed(
                 title="📋 System Logs",
                 color=0x0099ff,
-                timestamp=datetime.utcnow()
+                timestamp=discord.utils.utcnow()
             )
             
-            for node_info in nodes[:3]:  # Limit to 3 nodes
-                try:
-                    # Get logs from node
-                    logs = await self.bot.proxmox.get_logs(node_info["node"], lines)
-                    
-                    if logs:
-                        log_text = "\n".join(logs[:10])  # Limit to 10 lines per node
-                        if len(logs) > 10:
-                            log_text += f"\n... and {len(logs) - 10} more lines"
-                        
-                        embed.add_field(
-                            name=f"📋 {node_info['node']}",
-                            value=f"```\n{log_text}\n```",
-                            inline=False
-                        )
-                    else:
-                        embed.add_field(
-                            name=f"📋 {node_info['node']}",
-                            value="No logs available",
-                            inline=False
-                        )
-                        
-                except Exception as e:
-                    logger.warning(f"Failed to get logs for node {node_info['node']}: {e}")
-                    embed.add_field(
-                        name=f"📋 {node_info['node']}",
-                        value=f"Error: {str(e)}",
-                        inline=False
-                    )
+            async def fetch(node_name):
+                return await self.bot.proxmox.get_logs(node_name, lines)
+                
+            # Get logs from up to 3 nodes concurrently
+            nodes = nodes[:3]
+            logs_per_node = await asyncio.gather(*(fetch(node_info["node"]) for node_info in nodes), return_exceptions=True)
+            
+            # Render every node into one description instead of a field per node
+            buffer = io.StringIO()
+            for node_info, logs in zip(nodes, logs_per_node):
+                buffer.write(_format_node_logs(node_info["node"], logs))
+            embed.description = buffer.getvalue()[:MAX_LOGS_DESCRIPTION]
             
             await interaction.followup.send(embed=embed)
             
@@ -384,131 +634,41 @@ class MonitoringCog(commands.Cog):
             await interaction.followup.send(f"❌ Failed to get logs: {str(e)}")
             
     @app_commands.command(name="monitor_health", description="Perform a comprehensive health check")
+    @require_permission("perform health checks")
     async def monitor_health(self, interaction: discord.Interaction):
         """Perform a comprehensive health check"""
         await interaction.response.defer()
         
         try:
-            # Check permissions
-            if not self.bot.has_permission(interaction.user):
-                await interaction.followup.send("❌ You don't have permission to perform health checks.")
-                return
-                
-            health_checks = []
-            
-            # Check all nodes
-            nodes = await self.bot.proxmox.get_nodes()
-            for node in nodes:
-                try:
-                    # Get node status
-                    status = await self.bot.proxmox.get_node_status(node["node"])
-                    
-                    # Get node resources
-                    resources = await self.bot.proxmox.get_node_resources(node["node"])
-                    
-                    # Check node health
-                    node_health = {
-                        "node": node["node"],
-                        "status": "healthy",
-                        "issues": []
-                    }
-                    
-                    if status.get("status") != "online":
-                        node_health["status"] = "unhealthy"
-                        node_health["issues"].append(f"Node is {status.get('status', 'unknown')}")
-                    
-                    if resources:
-                        cpu_usage = resources.get("cpu", 0) * 100
-                        memory_usage = resources.get("mem", 0) / 1024 / 1024 / 1024  # GB
-                        memory_total = resources.get("maxmem", 0) / 1024 / 1024 / 1024  # GB
-                        memory_percent = (memory_usage / memory_total * 100) if memory_total > 0 else 0
-                        
-                        if cpu_usage > 80:
-                            node_health["issues"].append(f"High CPU usage: {cpu_usage:.1f}%")
-                            if cpu_usage > 95:
-                                node_health["status"] = "unhealthy"
-                        
-                        if memory_percent > 80:
-                            node_health["issues"].append(f"High memory usage: {memory_percent:.1f}%")
-                            if memory_percent > 95:
-                                node_health["status"] = "unhealthy"
-                    
-                    # Check VMs
-                    vms = await self.bot.proxmox.get_vms(node["node"])
-                    for vm in vms:
-                        if vm.get("status") == "running":
-                            try:
-                                vm_stats = await self.bot.proxmox.get_vm_stats(node["node"], vm["vmid"])
-                                if vm_stats:
-                                    vm_cpu = vm_stats.get("cpu", 0) * 100
-                                    vm_memory = vm_stats.get("mem", 0) / 1024 / 1024 / 1024  # GB
-                                    vm_max_memory = vm_stats.get("maxmem", 0) / 1024 / 1024 / 1024  # GB
-                                    vm_memory_percent = (vm_memory / vm_max_memory * 100) if vm_max_memory > 0 else 0
-                                    
-                                    if vm_cpu > 90:
-                                        node_health["issues"].append(f"VM {vm['name']} high CPU: {vm_cpu:.1f}%")
-                                    
-                                    if vm_memory_percent > 90:
-                                        node_health["issues"].append(f"VM {vm['name']} high memory: {vm_memory_percent:.1f}%")
-                            except Exception as e:
-                                logger.warning(f"Failed to check VM {vm['vmid']} health: {e}")
-                    
-                    health_checks.append(node_health)
-                    
-                except Exception as e:
-                    logger.warning(f"Failed to check health for node {node['node']}: {e}")
-                    health_checks.append({
-                        "node": node["node"],
-                        "status": "error",
-                        "issues": [f"Health check failed: {str(e)}"]
-                    })
+            # Check all nodes using the latest sampled data
+            snapshot = await self._get_snapshot()
             
-            # Create embed
-            embed = discord.Embed(
-                title="🏥 Health Check Report",
-                color=0x0099ff,
-                timestamp=datetime.utcnow()
-            )
+            embeds = await _render_embeds(_build_health_embeds, snapshot.nodes, snapshot.results, snapshot.vm_stats)
+            await send_embeds(interaction, embeds)
             
-            healthy_nodes = 0
-            unhealthy_nodes = 0
-            error_nodes = 0
-            
-            for health in health_checks:
-                if health["status"] == "healthy":
-                    healthy_nodes += 1
-                    status_emoji = "✅"
-                elif health["status"] == "unhealthy":
-                    unhealthy_nodes += 1
-                    status_emoji = "⚠️"
-                else:
-                    error_nodes += 1
-                    status_emoji = "❌"
-                
-                issues_text = "\n".join(health["issues"][:3]) if health["issues"] else "No issues"
-                if len(health["issues"]) > 3:
-                    issues_text += f"\n... and {len(health['issues']) - 3} more issues"
-                
-                embed.add_field(
-                    name=f"{status_emoji} {health['node']}",
-                    value=issues_text,
-                    inline=True
-                )
+        except Exception as e:
+            logger.error(f"Error performing health check: {e}")
+            await interaction.followup.send(f"❌ Failed to perform health check: {str(e)}")
             
-            # Summary
-            embed.add_field(
-                name="📊 Summary",
-                value=f"**Healthy:** {healthy_nodes}\n"
-                      f"**Unhealthy:** {unhealthy_nodes}\n"
-                      f"**Errors:** {error_nodes}",
-                inline=False
-            )
+    @app_commands.command(name="monitor_refresh", description="Re-poll all nodes and show fresh system status")
+    @require_permission("refresh monitoring data")
+    async def monitor_refresh(self, interaction: discord.Interaction):
+        """Re-poll all nodes and show fresh system status"""
+        await interaction.response.defer()
+        
+        try:
+            snapshot = await self._sample()
             
-            await interaction.followup.send(embed=embed)
+            if not snapshot.nodes:
+                await interaction.followup.send("❌ No nodes found.")
+                return
+                
+            embeds = await _render_embeds(_build_status_embeds, snapshot.nodes, snapshot.results)
+            await send_embeds(interaction, embeds)
             
         except Exception as e:
-            logger.error(f"Error performing health check: {e}")
-            await interaction.followup.send(f"❌ Failed to perform health check: {str(e)}")
+            logger.error(f"Error refreshing monitoring data: {e}")
+            await interaction.followup.send(f"❌ Failed to refresh monitoring data: {str(e)}")
 
 async def setup(bot):
     """Setup function for the cog"""
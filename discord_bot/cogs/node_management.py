@@ -5,13 +5,80 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import asyncio
+import functools
 import logging
+from itertools import islice
 from typing import Optional, List, Dict, Any
-from datetime import datetime
 import json
 
+from discord_bot.checks import require_permission
+from discord_bot.embeds import BYTES_TO_GB, build_embed, build_embeds, send_embeds
+
 logger = logging.getLogger(__name__)
 
+# Footer shown when Proxmox is unreachable and cached data is displayed
+STALE_FOOTER = "⚠ cached data, Proxmox is currently unreachable"
+
+# Message templates for node, storage, network and template fields
+_FMT_NODE = "**Status:** {}\n**CPU Usage:** {:.1f}%\n**Memory:** {:.1f}GB / {:.1f}GB\n**Uptime:** {} days".format
+_FMT_STORAGE = "**Type:** {}\n**Status:** {}\n**Used:** {:.1f}GB / {:.1f}GB ({:.1f}%)\n**Free:** {:.1f}GB".format
+_FMT_NETWORK = "**Type:** {}\n**Status:** {}\n**Method:** {}\n**Address:** {}\n**Netmask:** {}".format
+_FMT_TEMPLATE = "**Size:** {:.1f}GB\n**Format:** {}".format
+
+# Emoji for healthy node, storage and interface states; anything else is shown red
+_STATUS_EMOJI = {"online": "🟢", "available": "🟢", "up": "🟢"}
+_DEFAULT_STATUS_EMOJI = "🔴"
+
+class NodeSummary:
+    """Status and resource usage of one node, as shown by node_list"""
+    
+    __slots__ = ("name", "status", "cpu", "mem", "mem_max", "uptime", "emoji")
+    
+    def __init__(self, name: str, status: str, cpu: float, mem: float, mem_max: float, uptime: int):
+        self.name = name
+        self.status = status
+        self.cpu = cpu
+        self.mem = mem
+        self.mem_max = mem_max
+        self.uptime = uptime
+        self.emoji = _STATUS_EMOJI.get(status, _DEFAULT_STATUS_EMOJI)
+        
+    @classmethod
+    def from_resource(cls, node: Dict[str, Any]) -> "NodeSummary":
+        """Build a summary from a cluster/resources node row"""
+        return cls(
+            node["node"],
+            node.get("status", "Unknown"),
+            node.get("cpu", 0) * 100,
+            node.get("mem", 0) * BYTES_TO_GB,
+            node.get("maxmem", 0) * BYTES_TO_GB,
+            node.get("uptime", 0)
+        )
+        
+    def to_field(self) -> Dict[str, Any]:
+        """Render the summary as an embed field dict"""
+        return {
+            "name": f"{self.emoji} {self.name}",
+            "value": _FMT_NODE(self.status, self.cpu, self.mem, self.mem_max, self.uptime // 86400),
+            "inline": True
+        }
+
+def proxmox_command(failed: str):
+    """Wrap a node command, applied under require_permission, with the shared defer and error reply"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, interaction: discord.Interaction, *args, **kwargs):
+            await interaction.response.defer()
+            
+            try:
+                await func(self, interaction, *args, **kwargs)
+            except Exception as e:
+                logger.error("Failed to %s: %s", failed, e)
+                await interaction.followup.send(f"❌ Failed to {failed}: {str(e)}")
+                
+        return wrapper
+    return decorator
+
 class NodeManagementCog(commands.Cog):
     """Node Management commands"""
     
@@ -19,270 +86,196 @@ class NodeManagementCog(commands.Cog):
         self.bot = bot
         
     @app_commands.command(name="node_list", description="List all Proxmox nodes and their status")
+    @require_permission("view nodes")
+    @proxmox_command("list nodes")
     async def node_list(self, interaction: discord.Interaction):
         """List all Proxmox nodes"""
-        await interaction.response.defer()
-        
-        try:
-            # Check permissions
-            if not self.bot.has_permission(interaction.user):
-                await interaction.followup.send("❌ You don't have permission to view nodes.")
-                return
-                
-            nodes = await self.bot.proxmox.get_nodes()
+        # One cluster-wide request returns status and usage of every node
+        with self.bot.proxmox.track_stale() as stale:
+            nodes = await self.bot.proxmox.get_cluster_resources("node")
             
-            if not nodes:
-                await interaction.followup.send("❌ No nodes found.")
-                return
-                
-            embed = discord.Embed(
-                title="🖥️ Proxmox Nodes",
-                color=0x0099ff,
-                timestamp=datetime.utcnow()
-            )
+        if not nodes:
+            await interaction.followup.send("❌ No nodes found.")
+            return
             
-            for node in nodes:
-                try:
-                    # Get node status
-                    status = await self.bot.proxmox.get_node_status(node["node"])
-                    
-                    # Get node resources
-                    resources = await self.bot.proxmox.get_node_resources(node["node"])
-                    
-                    # Calculate resource usage
-                    cpu_usage = 0
-                    memory_usage = 0
-                    memory_total = 0
-                    
-                    if resources:
-                        cpu_usage = resources.get("cpu", 0) * 100
-                        memory_usage = resources.get("mem", 0) / 1024 / 1024 / 1024  # Convert to GB
-                        memory_total = resources.get("maxmem", 0) / 1024 / 1024 / 1024  # Convert to GB
-                    
-                    status_emoji = "🟢" if status.get("status") == "online" else "🔴"
-                    
-                    embed.add_field(
-                        name=f"{status_emoji} {node['node']}",
-                        value=f"**Status:** {status.get('status', 'Unknown')}\n"
-                              f"**CPU Usage:** {cpu_usage:.1f}%\n"
-                              f"**Memory:** {memory_usage:.1f}GB / {memory_total:.1f}GB\n"
-                              f"**Uptime:** {status.get('uptime', 0) // 86400} days",
-                        inline=True
-                    )
-                    
-                except Exception as e:
-                    logger.warning(f"Failed to get status for node {node['node']}: {e}")
-                    embed.add_field(
-                        name=f"🔴 {node['node']}",
-                        value="**Status:** Error\n**Details:** Unable to fetch status",
-                        inline=True
-                    )
-                    
-            await interaction.followup.send(embed=embed)
-            
-        except Exception as e:
-            logger.error(f"Error listing nodes: {e}")
-            await interaction.followup.send(f"❌ Failed to list nodes: {str(e)}")
+        summaries = [NodeSummary.from_resource(node) for node in nodes]
+        fields = [summary.to_field() for summary in summaries]
+        
+        embeds = build_embeds("🖥️ Proxmox Nodes", 0x0099ff, fields)
+        
+        if stale:
+            embeds[-1].set_footer(text=STALE_FOOTER)
             
+        await send_embeds(interaction, embeds)
+        
     @app_commands.command(name="node_info", description="Get detailed information about a specific node")
     @app_commands.describe(node="Node name to get info for")
+    @require_permission("view node info")
+    @proxmox_command("get node info")
     async def node_info(self, interaction: discord.Interaction, node: str):
         """Get detailed node information"""
-        await interaction.response.defer()
-        
-        try:
-            # Check permissions
-            if not self.bot.has_permission(interaction.user):
-                await interaction.followup.send("❌ You don't have permission to view node info.")
-                return
-                
-            # Get node status
-            status = await self.bot.proxmox.get_node_status(node)
+        # Get node status, resources, VMs and storage concurrently; the VM
+        # list comes from the cluster-wide listing shared by all nodes
+        with self.bot.proxmox.track_stale() as stale:
+            status, resources, cluster_vms, storage = await asyncio.gather(
+                self.bot.proxmox.get_node_status(node),
+                self.bot.proxmox.get_node_resources(node),
+                self.bot.proxmox.get_cluster_resources("vm"),
+                self.bot.proxmox.get_storage(node),
+                return_exceptions=True
+            )
             
-            # Get node resources
-            resources = await self.bot.proxmox.get_node_resources(node)
+        # Only the storage listing is optional
+        for result in (status, resources, cluster_vms):
+            if isinstance(result, Exception):
+                raise result
+                
+        vms = [vm for vm in cluster_vms if vm.get("node") == node and vm.get("type") == "qemu"]
+        
+        embed = discord.Embed(
+            title=f"🖥️ Node: {node}",
+            color=0x0099ff,
+            timestamp=discord.utils.utcnow()
+        )
+        
+        # Basic info
+        embed.add_field(name="Status", value=status.get("status", "Unknown"), inline=True)
+        embed.add_field(name="Uptime", value=f"{status.get('uptime', 0) // 86400} days", inline=True)
+        embed.add_field(name="Load Average", value=status.get("loadavg", "N/A"), inline=True)
+        
+        # CPU info
+        if resources:
+            cpu_usage = resources.get("cpu", 0) * 100
+            embed.add_field(name="CPU Usage", value=f"{cpu_usage:.1f}%", inline=True)
+            
+            # Memory info
+            memory_used = resources.get("mem", 0) * BYTES_TO_GB
+            memory_total = resources.get("maxmem", 0) * BYTES_TO_GB
+            memory_percent = (memory_used / memory_total * 100) if memory_total > 0 else 0
+            
+            embed.add_field(
+                name="Memory",
+                value=f"{memory_used:.1f}GB / {memory_total:.1f}GB ({memory_percent:.1f}%)",
+                inline=True
+            )
             
-            # Get VMs on this node
-            vms = await self.bot.proxmox.get_vms(node)
+            # Disk info
+            disk_used = resources.get("disk", 0) * BYTES_TO_GB
+            disk_total = resources.get("maxdisk", 0) * BYTES_TO_GB
+            disk_percent = (disk_used / disk_total * 100) if disk_total > 0 else 0
             
-            embed = discord.Embed(
-                title=f"🖥️ Node: {node}",
-                color=0x0099ff,
-                timestamp=datetime.utcnow()
+            embed.add_field(
+                name="Disk",
+                value=f"{disk_used:.1f}GB / {disk_total:.1f}GB ({disk_percent:.1f}%)",
+                inline=True
             )
+        
+        # VM count
+        running_vms = sum(1 for vm in vms if vm.get("status") == "running")
+        total_vms = len(vms)
+        
+        embed.add_field(name="VMs", value=f"{running_vms} running / {total_vms} total", inline=True)
+        
+        # Storage info
+        if isinstance(storage, Exception):
+            logger.warning("Failed to get storage info for node %s: %s", node, storage)
+        else:
+            storage_info = []
+            for store in islice(storage, 5):  # Limit to 5 storage devices
+                store_name = store.get("storage", "Unknown")
+                store_type = store.get("type", "Unknown")
+                storage_info.append(f"**{store_name}** ({store_type})")
             
-            # Basic info
-            embed.add_field(name="Status", value=status.get("status", "Unknown"), inline=True)
-            embed.add_field(name="Uptime", value=f"{status.get('uptime', 0) // 86400} days", inline=True)
-            embed.add_field(name="Load Average", value=status.get("loadavg", "N/A"), inline=True)
-            
-            # CPU info
-            if resources:
-                cpu_usage = resources.get("cpu", 0) * 100
-                embed.add_field(name="CPU Usage", value=f"{cpu_usage:.1f}%", inline=True)
-                
-                # Memory info
-                memory_used = resources.get("mem", 0) / 1024 / 1024 / 1024  # GB
-                memory_total = resources.get("maxmem", 0) / 1024 / 1024 / 1024  # GB
-                memory_percent = (memory_used / memory_total * 100) if memory_total > 0 else 0
-                
+            if storage_info:
                 embed.add_field(
-                    name="Memory",
-                    value=f"{memory_used:.1f}GB / {memory_total:.1f}GB ({memory_percent:.1f}%)",
-                    inline=True
+                    name="Storage",
+                    value="\n".join(storage_info),
+                    inline=False
                 )
                 
-                # Disk info
-                disk_used = resources.get("disk", 0) / 1024 / 1024 / 1024  # GB
-                disk_total = resources.get("maxdisk", 0) / 1024 / 1024 / 1024  # GB
-                disk_percent = (disk_used / disk_total * 100) if disk_total > 0 else 0
-                
-                embed.add_field(
-                    name="Disk",
-                    value=f"{disk_used:.1f}GB / {disk_total:.1f}GB ({disk_percent:.1f}%)",
-                    inline=True
-                )
-            
-            # VM count
-            running_vms = len([vm for vm in vms if vm.get("status") == "running"])
-            total_vms = len(vms)
-            
-            embed.add_field(name="VMs", value=f"{running_vms} running / {total_vms} total", inline=True)
-            
-            # Storage info
-            try:
-                storage = await self.bot.proxmox.get_storage(node)
-                storage_info = []
-                for store in storage[:5]:  # Limit to 5 storage devices
-                    store_name = store.get("storage", "Unknown")
-                    store_type = store.get("type", "Unknown")
-                    storage_info.append(f"**{store_name}** ({store_type})")
-                
-                if storage_info:
-                    embed.add_field(
-                        name="Storage",
-                        value="\n".join(storage_info),
-                        inline=False
-                    )
-                    
-            except Exception as e:
-                logger.warning(f"Failed to get storage info for node {node}: {e}")
-            
-            await interaction.followup.send(embed=embed)
-            
-        except Exception as e:
-            logger.error(f"Error getting node info: {e}")
-            await interaction.followup.send(f"❌ Failed to get node info: {str(e)}")
+        if stale:
+            embed.set_footer(text=STALE_FOOTER)
             
+        await interaction.followup.send(embed=embed)
+        
     @app_commands.command(name="node_storage", description="Get storage information for a node")
     @app_commands.describe(node="Node name to get storage info for")
+    @require_permission("view storage info")
+    @proxmox_command("get storage info")
     async def node_storage(self, interaction: discord.Interaction, node: str):
         """Get storage information for a node"""
-        await interaction.response.defer()
+        storage = await self.bot.proxmox.get_storage(node)
         
-        try:
-            # Check permissions
-            if not self.bot.has_permission(interaction.user):
-                await interaction.followup.send("❌ You don't have permission to view storage info.")
-                return
-                
-            storage = await self.bot.proxmox.get_storage(node)
-            
-            if not storage:
-                await interaction.followup.send("❌ No storage found on this node.")
-                return
-                
-            embed = discord.Embed(
-                title=f"💾 Storage: {node}",
-                color=0x0099ff,
-                timestamp=datetime.utcnow()
-            )
-            
-            for store in storage:
-                store_name = store.get("storage", "Unknown")
-                store_type = store.get("type", "Unknown")
-                store_status = store.get("status", "Unknown")
-                
-                # Calculate usage
-                total_space = store.get("total", 0) / 1024 / 1024 / 1024  # GB
-                used_space = store.get("used", 0) / 1024 / 1024 / 1024  # GB
-                free_space = total_space - used_space
-                usage_percent = (used_space / total_space * 100) if total_space > 0 else 0
-                
-                status_emoji = "🟢" if store_status == "available" else "🔴"
-                
-                embed.add_field(
-                    name=f"{status_emoji} {store_name}",
-                    value=f"**Type:** {store_type}\n"
-                          f"**Status:** {store_status}\n"
-                          f"**Used:** {used_space:.1f}GB / {total_space:.1f}GB ({usage_percent:.1f}%)\n"
-                          f"**Free:** {free_space:.1f}GB",
-                    inline=True
-                )
-                
-            await interaction.followup.send(embed=embed)
-            
-        except Exception as e:
-            logger.error(f"Error getting storage info: {e}")
-            await interaction.followup.send(f"❌ Failed to get storage info: {str(e)}")
+        if not storage:
+            await interaction.followup.send("❌ No storage found on this node.")
+            return
             
+        fields = []
+        
+        for store in storage:
+            store_name = store.get("storage", "Unknown")
+            store_type = store.get("type", "Unknown")
+            store_status = store.get("status", "Unknown")
+            
+            # Calculate usage
+            total_space = store.get("total", 0) * BYTES_TO_GB
+            used_space = store.get("used", 0) * BYTES_TO_GB
+            free_space = total_space - used_space
+            usage_percent = (used_space / total_space * 100) if total_space > 0 else 0
+            
+            status_emoji = _STATUS_EMOJI.get(store_status, _DEFAULT_STATUS_EMOJI)
+            
+            fields.append({
+                "name": f"{status_emoji} {store_name}",
+                "value": _FMT_STORAGE(store_type, store_status, used_space, total_space, usage_percent, free_space),
+                "inline": True
+            })
+            
+        embed = build_embed(f"💾 Storage: {node}", 0x0099ff, fields)
+        await interaction.followup.send(embed=embed)
+        
     @app_commands.command(name="node_network", description="Get network information for a node")
     @app_commands.describe(node="Node name to get network info for")
+    @require_permission("view network info")
+    @proxmox_command("get network info")
     async def node_network(self, interaction: discord.Interaction, node: str):
         """Get network information for a node"""
-        await interaction.response.defer()
+        networks = await self.bot.proxmox.get_networks(node)
         
-        try:
-            # Check permissions
-            if not self.bot.has_permission(interaction.user):
-                await interaction.followup.send("❌ You don't have permission to view network info.")
-                return
-                
-            networks = await self.bot.proxmox.get_networks(node)
-            
-            if not networks:
-                await interaction.followup.send("❌ No network interfaces found on this node.")
-                return
-                
-            embed = discord.Embed(
-                title=f"🌐 Network: {node}",
-                color=0x0099ff,
-                timestamp=datetime.utcnow()
-            )
-            
-            for network in networks:
-                if_name = network.get("iface", "Unknown")
-                if_type = network.get("type", "Unknown")
-                if_status = network.get("status", "Unknown")
-                
-                # Get additional info
-                method = network.get("method", "N/A")
-                address = network.get("address", "N/A")
-                netmask = network.get("netmask", "N/A")
-                
-                status_emoji = "🟢" if if_status == "up" else "🔴"
-                
-                embed.add_field(
-                    name=f"{status_emoji} {if_name}",
-                    value=f"**Type:** {if_type}\n"
-                          f"**Status:** {if_status}\n"
-                          f"**Method:** {method}\n"
-                          f"**Address:** {address}\n"
-                          f"**Netmask:** {netmask}",
-                    inline=True
-                )
-                
-            await interaction.followup.send(embed=embed)
-            
-        except Exception as e:
-            logger.error(f"Error getting network info: {e}")
-            await interaction.followup.send(f"❌ Failed to get network info: {str(e)}")
+        if not networks:
+            await interaction.followup.send("❌ No network interfaces found on this node.")
+            return
             
+        fields = []
+        
+        for network in networks:
+            if_name = network.get("iface", "Unknown")
+            if_type = network.get("type", "Unknown")
+            if_status = network.get("status", "Unknown")
+            
+            # Get additional info
+            method = network.get("method", "N/A")
+            address = network.get("address", "N/A")
+            netmask = network.get("netmask", "N/A")
+            
+            status_emoji = _STATUS_EMOJI.get(if_status, _DEFAULT_STATUS_EMOJI)
+            
+            fields.append({
+                "name": f"{status_emoji} {if_name}",
+                "value": _FMT_NETWORK(if_type, if_status, method, address, netmask),
+                "inline": True
+            })
+            
+        embed = build_embed(f"🌐 Network: {node}", 0x0099ff, fields)
+        await interaction.followup.send(embed=embed)
+        
     @app_commands.command(name="node_templates", description="Get available templates on a node")
     @app_commands.describe(
         node="Node name to get templates from",
         storage="Storage name (optional)"
     )
+    @require_permission("view templates")
+    @proxmox_command("get templates")
     async def node_templates(
         self,
         interaction: discord.Interaction,
@@ -290,56 +283,44 @@ class NodeManagementCog(commands.Cog):
         storage: Optional[str] = None
     ):
         """Get available templates on a node"""
-        await interaction.response.defer()
-        
-        try:
-            # Check permissions
-            if not self.bot.has_permission(interaction.user):
-                await interaction.followup.send("❌ You don't have permission to view templates.")
-                return
-                
-            if not storage:
-                # Get default storage
-                storage = self.bot.database.settings.default_storage
-                
-            templates = await self.bot.proxmox.get_templates(node, storage)
+        if not storage:
+            # Get default storage
+            storage = self.bot.database.settings.default_storage
             
-            if not templates:
-                await interaction.followup.send("❌ No templates found on this node.")
-                return
-                
-            embed = discord.Embed(
-                title=f"📦 Templates: {node}",
-                color=0x0099ff,
-                timestamp=datetime.utcnow()
-            )
-            
-            for template in templates[:10]:  # Limit to 10 templates
-                template_name = template.get("volid", "Unknown")
-                template_size = template.get("size", 0) / 1024 / 1024 / 1024  # GB
-                template_format = template.get("format", "Unknown")
-                
-                embed.add_field(
-                    name=template_name,
-                    value=f"**Size:** {template_size:.1f}GB\n"
-                          f"**Format:** {template_format}",
-                    inline=True
-                )
-                
-            if len(templates) > 10:
-                embed.set_footer(text=f"Showing 10 of {len(templates)} templates")
-                
-            await interaction.followup.send(embed=embed)
+        templates = await self.bot.proxmox.get_templates(node, storage)
+        
+        if not templates:
+            await interaction.followup.send("❌ No templates found on this node.")
+            return
             
-        except Exception as e:
-            logger.error(f"Error getting templates: {e}")
-            await interaction.followup.send(f"❌ Failed to get templates: {str(e)}")
+        fields = []
+        
+        for template in islice(templates, 10):  # Limit to 10 templates
+            template_name = template.get("volid", "Unknown")
+            template_size = template.get("size", 0) * BYTES_TO_GB
+            template_format = template.get("format", "Unknown")
+            
+            fields.append({
+                "name": template_name,
+                "value": _FMT_TEMPLATE(template_size, template_format),
+                "inline": True
+            })
+            
+        embed = build_embed(f"📦 Templates: {node}", 0x0099ff, fields)
+        
+        total_templates = len(templates)
+        if total_templates > 10:
+            embed.set_footer(text=f"Showing 10 of {total_templates} templates")
             
+        await interaction.followup.send(embed=embed)
+        
     @app_commands.command(name="node_migrate", description="Migrate a VM to another node")
     @app_commands.describe(
         vmid="VM ID to migrate",
         target_node="Target node name"
     )
+    @require_permission("migrate VMs")
+    @proxmox_command("migrate VM")
     async def node_migrate(
         self,
         interaction: discord.Interaction,
@@ -347,56 +328,47 @@ class NodeManagementCog(commands.Cog):
         target_node: str
     ):
         """Migrate a VM to another node"""
-        await interaction.response.defer()
+        # Look up the VM and the cluster's node names concurrently
+        vm, node_names = await asyncio.gather(
+            self.bot.database.get_vm_by_id(vmid),
+            self.bot.proxmox.get_node_name_set()
+        )
         
-        try:
-            # Check permissions
-            if not self.bot.has_permission(interaction.user):
-                await interaction.followup.send("❌ You don't have permission to migrate VMs.")
-                return
-                
-            # Check if user owns this VM
-            vm = await self.bot.database.get_vm_by_id(vmid)
-            if not vm or vm["owner_id"] != interaction.user.id:
-                await interaction.followup.send("❌ VM not found or you don't own it.")
-                return
-                
-            # Check if target node exists
-            nodes = await self.bot.proxmox.get_nodes()
-            target_node_exists = any(node["node"] == target_node for node in nodes)
-            
-            if not target_node_exists:
-                await interaction.followup.send(f"❌ Target node '{target_node}' not found.")
-                return
-                
-            # Migrate VM
-            migrate_config = {
-                "online": 1,  # Online migration
-                "with-local-disks": 1
-            }
-            
-            result = await self.bot.proxmox.migrate_vm(
-                vm["node"], vmid, target_node, migrate_config
-            )
-            
-            # Update VM node in database
-            await self.bot.database.update_vm_node(vmid, target_node)
-            
-            embed = discord.Embed(
-                title="✅ VM Migration Started",
-                color=0x00ff00,
-                timestamp=datetime.utcnow()
-            )
-            embed.add_field(name="VM", value=f"{vm['name']} (ID: {vmid})", inline=True)
-            embed.add_field(name="Source Node", value=vm["node"], inline=True)
-            embed.add_field(name="Target Node", value=target_node, inline=True)
-            embed.add_field(name="Status", value="Migrating...", inline=True)
-            
-            await interaction.followup.send(embed=embed)
-            
-        except Exception as e:
-            logger.error(f"Error migrating VM: {e}")
-            await interaction.followup.send(f"❌ Failed to migrate VM: {str(e)}")
+        # Check if user owns this VM
+        if not vm or vm["owner_id"] != interaction.user.id:
+            await interaction.followup.send("❌ VM not found or you don't own it.")
+            return
+            
+        # Check if target node exists
+        if target_node not in node_names:
+            await interaction.followup.send(f"❌ Target node '{target_node}' not found.")
+            return
+            
+        # Migrate VM
+        migrate_config = {
+            "online": 1,  # Online migration
+            "with-local-disks": 1
+        }
+        
+        result = await self.bot.proxmox.migrate_vm(
+            vm["node"], vmid, target_node, migrate_config
+        )
+        
+        # Update VM node in database
+        await self.bot.database.update_vm_node(vmid, target_node)
+        await self.bot.vm_cache.invalidate_vm(vmid)
+        
+        embed = discord.Embed(
+            title="✅ VM Migration Started",
+            color=0x00ff00,
+            timestamp=discord.utils.utcnow()
+        )
+        embed.add_field(name="VM", value=f"{vm['name']} (ID: {vmid})", inline=True)
+        embed.add_field(name="Source Node", value=vm["node"], inline=True)
+        embed.add_field(name="Target Node", value=target_node, inline=True)
+        embed.add_field(name="Status", value="Migrating...", inline=True)
+        
+        await interaction.followup.send(embed=embed)
 
 async def setup(bot):
     """Setup function for the cog"""
@@ -6,53 +6,160 @@ from discord.ext import commands
 from discord import app_commands
 import asyncio
 import logging
-from typing import Optional, List, Dict, Any
-from datetime import datetime
+import time
+from typing import Optional, List, Dict, Any, Mapping, Tuple
 import json
 
+from discord_bot.checks import require_permission
+from discord_bot.embeds import MAX_FIELD_VALUE, build_embed
+
 logger = logging.getLogger(__name__)
 
+# Seconds template_check waits for any single node before giving up on it
+TEMPLATE_CHECK_TIMEOUT = 10
+
+# Polling of a VM being stopped before it is converted to a template
+VM_STOP_TIMEOUT = 30
+VM_STOP_POLL_INITIAL = 0.2
+VM_STOP_POLL_MAX = 3.2
+
+# Database template lookups are cached per name for this many seconds
+TEMPLATE_CACHE_TTL = 60
+TEMPLATE_CACHE_SIZE = 256
+
+# Static field layouts as (name, value format, inline) triples
+_INFO_FIELD_SPECS = (
+    ("Template ID", "{id}", True),
+    ("Display Name", "{name}", True),
+    ("Template File", "{template_file}", True),
+    ("Minimum Memory", "{min_memory} MB", True),
+    ("Minimum Cores", "{min_cores}", True),
+    ("Minimum Disk", "{min_disk} GB", True),
+    ("Default User", "{default_user}", True),
+    ("SSH Port", "{ssh_port}", True)
+)
+_DOWNLOAD_FIELD_SPECS = (
+    ("Template", "{name}", True),
+    ("Node", "{node}", True),
+    ("Storage", "{storage}", True),
+    ("Status", "Downloading...", True)
+)
+_CREATE_FIELD_SPECS = (
+    ("Template Name", "{template_name}", True),
+    ("Source VM", "{vm_name} (ID: {vmid})", True),
+    ("Node", "{node}", True),
+    ("Description", "{description}", False)
+)
+_DELETE_FIELD_SPECS = (
+    ("Template Name", "{template_name}", True),
+    ("Status", "Deleted", True)
+)
+
+# Field value for a template in template_list
+_FMT_TEMPLATE_FIELD = (
+    "**ID:** `{0}`\n**Min Memory:** {min_memory} MB\n**Min Cores:** {min_cores}\n"
+    "**Min Disk:** {min_disk} GB\n**Default User:** {default_user}\n**SSH Port:** {ssh_port}"
+).format
+
+def _spec_fields(specs: Tuple[Tuple[str, str, bool], ...], values: Mapping[str, Any]) -> List[Dict[str, Any]]:
+    """Fill a static field layout with one command's values"""
+    return [
+        {"name": name, "value": value_format.format_map(values), "inline": inline}
+        for name, value_format, inline in specs
+    ]
+
+def _line_fields(name: str, lines: List[str], inline: bool = True) -> List[Dict[str, Any]]:
+    """Join lines into as many fields as needed to stay under the field value limit"""
+    fields = []
+    chunk = []
+    size = 0
+    for line in lines:
+        if chunk and size + len(line) > MAX_FIELD_VALUE:
+            fields.append({"name": name, "value": "\n".join(chunk), "inline": inline})
+            chunk = []
+            size = 0
+        chunk.append(line)
+        size += len(line) + 1
+    if chunk:
+        fields.append({"name": name, "value": "\n".join(chunk), "inline": inline})
+    return fields
+
 class TemplateManagementCog(commands.Cog):
     """Template Management commands"""
     
     def __init__(self, bot):
         self.bot = bot
+        # Cogs are loaded once the database and Proxmox client exist
+        self._db = bot.database
+        self._settings = bot.database.settings
+        self._pve = bot.proxmox
+        self._list_fields: Optional[Tuple[Any, List[Dict[str, Any]]]] = None
+        self._template_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        
+    async def _get_template(self, template_name: str) -> Optional[Dict[str, Any]]:
+        """Get a template from the database, reusing recent lookups"""
+        now = time.monotonic()
+        cached = self._template_cache.get(template_name)
+        if cached and cached[0] > now:
+            return cached[1]
+            
+        template = await self._db.get_template_by_name(template_name)
+        if not template:
+            # Misses are not cached so a new template shows up immediately
+            self._template_cache.pop(template_name, None)
+            return template
+            
+        if len(self._template_cache) >= TEMPLATE_CACHE_SIZE:
+            # Drop the oldest entry (dicts keep insertion order)
+            self._template_cache.pop(next(iter(self._template_cache)))
+        self._template_cache[template_name] = (now + TEMPLATE_CACHE_TTL, template)
+        return template
         
+    def _template_list_fields(self, templates: Mapping[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return the template_list fields, formatting them only when the templates change"""
+        if self._list_fields is None or self._list_fields[0] is not templates:
+            self._list_fields = (templates, [
+                {
+                    "name": f"🐧 {template_info['name']}",
+                    "value": _FMT_TEMPLATE_FIELD(template_id, **template_info),
+                    "inline": True
+                }
+                for template_id, template_info in templates.items()
+            ])
+        return self._list_fields[1]
+        
+    async def _wait_for_vm_stopped(self, node: str, vmid: int):
+        """Poll the VM status with exponential backoff until it has stopped"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + VM_STOP_TIMEOUT
+        delay = VM_STOP_POLL_INITIAL
+        
+        while True:
+            status = await self._pve.get_vm_status(node, vmid)
+            if status.get("status") == "stopped":
+                return
+                
+            if loop.time() >= deadline:
+                raise Exception(f"VM {vmid} did not stop within {VM_STOP_TIMEOUT} seconds")
+                
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, VM_STOP_POLL_MAX)
+            
     @app_commands.command(name="template_list", description="List all available OS templates")
+    @require_permission("view templates")
     async def template_list(self, interaction: discord.Interaction):
         """List all available OS templates"""
+        templates = self._settings.available_templates
+        if not templates:
+            await interaction.response.send_message("❌ No templates available.", ephemeral=True)
+            return
+            
         await interaction.response.defer()
         
         try:
-            # Check permissions
-            if not self.bot.has_permission(interaction.user):
-                await interaction.followup.send("❌ You don't have permission to view templates.")
-                return
-                
-            templates = self.bot.database.settings.available_templates
-            
-            if not templates:
-                await interaction.followup.send("❌ No templates available.")
-                return
-                
-            embed = discord.Embed(
-                title="📦 Available OS Templates",
-                color=0x0099ff,
-                timestamp=datetime.utcnow()
-            )
-            
-            for template_id, template_info in templates.items():
-                embed.add_field(
-                    name=f"🐧 {template_info['name']}",
-                    value=f"**ID:** `{template_id}`\n"
-                          f"**Min Memory:** {template_info['min_memory']} MB\n"
-                          f"**Min Cores:** {template_info['min_cores']}\n"
-                          f"**Min Disk:** {template_info['min_disk']} GB\n"
-                          f"**Default User:** {template_info['default_user']}\n"
-                          f"**SSH Port:** {template_info['ssh_port']}",
-                    inline=True
-                )
-                
+            # Copy the cached fields; the embed adopts the list it is given
+            fields = list(self._template_list_fields(templates))
+            embed = build_embed("📦 Available OS Templates", 0x0099ff, fields)
             await interaction.followup.send(embed=embed)
             
         except Exception as e:
@@ -61,72 +168,47 @@ class TemplateManagementCog(commands.Cog):
             
     @app_commands.command(name="template_info", description="Get detailed information about a specific template")
     @app_commands.describe(template_id="Template ID to get info for")
+    @require_permission("view template info")
     async def template_info(self, interaction: discord.Interaction, template_id: str):
         """Get detailed information about a specific template"""
+        # Reject unknown templates before deferring
+        templates = self._settings.available_templates
+        if template_id not in templates:
+            await interaction.response.send_message(f"❌ Template '{template_id}' not found.", ephemeral=True)
+            return
+            
         await interaction.response.defer()
         
         try:
-            # Check permissions
-            if not self.bot.has_permission(interaction.user):
-                await interaction.followup.send("❌ You don't have permission to view template info.")
-                return
-                
-            templates = self.bot.database.settings.available_templates
-            
-            if template_id not in templates:
-                await interaction.followup.send(f"❌ Template '{template_id}' not found.")
-                return
-                
             template_info = templates[template_id]
             
-            embed = discord.Embed(
-                title=f"📦 Template: {template_info['name']}",
-                color=0x0099ff,
-                timestamp=datetime.utcnow()
-            )
+            fields = _spec_fields(_INFO_FIELD_SPECS, {**template_info, "id": template_id})
             
-            embed.add_field(name="Template ID", value=template_id, inline=True)
-            embed.add_field(name="Display Name", value=template_info['name'], inline=True)
-            embed.add_field(name="Template File", value=template_info['template_file'], inline=True)
-            embed.add_field(name="Minimum Memory", value=f"{template_info['min_memory']} MB", inline=True)
-            embed.add_field(name="Minimum Cores", value=str(template_info['min_cores']), inline=True)
-            embed.add_field(name="Minimum Disk", value=f"{template_info['min_disk']} GB", inline=True)
-            embed.add_field(name="Default User", value=template_info['default_user'], inline=True)
-            embed.add_field(name="SSH Port", value=str(template_info['ssh_port']), inline=True)
-            
-            # Check if template is available on nodes
-            nodes = await self.bot.proxmox.get_nodes()
+            # Check if template is available on nodes, querying all nodes concurrently
+            nodes = await self._pve.get_nodes()
+            storage = self._settings.default_storage
+            results = await asyncio.gather(
+                *(self._pve.get_template_volids(node["node"], storage) for node in nodes),
+                return_exceptions=True
+            )
+            volid = f"{storage}:vztmpl/{template_info['template_file']}"
             available_nodes = []
             
-            for node in nodes:
-                try:
-                    storage = self.bot.database.settings.default_storage
-                    node_templates = await self.bot.proxmox.get_templates(node["node"], storage)
-                    
-                    template_available = any(
-                        template.get("volid") == template_info['template_file']
-                        for template in node_templates
-                    )
+            for node, volids in zip(nodes, results):
+                if isinstance(volids, Exception):
+                    logger.warning(f"Failed to check template availability on node {node['node']}: {volids}")
+                    continue
                     
-                    if template_available:
-                        available_nodes.append(node["node"])
-                        
-                except Exception as e:
-                    logger.warning(f"Failed to check template availability on node {node['node']}: {e}")
-            
-            if available_nodes:
-                embed.add_field(
-                    name="Available On Nodes",
-                    value=", ".join(available_nodes),
-                    inline=False
-                )
-            else:
-                embed.add_field(
-                    name="Available On Nodes",
-                    value="Not available on any node",
-                    inline=False
-                )
+                if volid in volids:
+                    available_nodes.append(node["node"])
             
+            fields.append({
+                "name": "Available On Nodes",
+                "value": ", ".join(available_nodes) if available_nodes else "Not available on any node",
+                "inline": False
+            })
+            
+            embed = build_embed(f"📦 Template: {template_info['name']}", 0x0099ff, fields)
             await interaction.followup.send(embed=embed)
             
         except Exception as e:
@@ -139,6 +221,7 @@ class TemplateManagementCog(commands.Cog):
         node="Node to download template to",
         storage="Storage to download template to (optional)"
     )
+    @require_permission("download templates")
     async def template_download(
         self,
         interaction: discord.Interaction,
@@ -147,37 +230,25 @@ class TemplateManagementCog(commands.Cog):
         storage: Optional[str] = None
     ):
         """Download a template to a specific node"""
+        # Reject unknown templates before deferring
+        templates = self._settings.available_templates
+        if template_id not in templates:
+            await interaction.response.send_message(f"❌ Template '{template_id}' not found.", ephemeral=True)
+            return
+            
         await interaction.response.defer()
         
         try:
-            # Check permissions
-            if not self.bot.has_permission(interaction.user):
-                await interaction.followup.send("❌ You don't have permission to download templates.")
-                return
-                
-            templates = self.bot.database.settings.available_templates
-            
-            if template_id not in templates:
-                await interaction.followup.send(f"❌ Template '{template_id}' not found.")
-                return
-                
             template_info = templates[template_id]
             
             if not storage:
-                storage = self.bot.database.settings.default_storage
+                storage = self._settings.default_storage
                 
             # Download template
-            result = await self.bot.proxmox.download_template(node, storage, template_info['template_file'])
+            result = await self._pve.download_template(node, storage, template_info['template_file'])
             
-            embed = discord.Embed(
-                title="✅ Template Download Started",
-                color=0x00ff00,
-                timestamp=datetime.utcnow()
-            )
-            embed.add_field(name="Template", value=template_info['name'], inline=True)
-            embed.add_field(name="Node", value=node, inline=True)
-            embed.add_field(name="Storage", value=storage, inline=True)
-            embed.add_field(name="Status", value="Downloading...", inline=True)
+            fields = _spec_fields(_DOWNLOAD_FIELD_SPECS, {"name": template_info['name'], "node": node, "storage": storage})
+            embed = build_embed("✅ Template Download Started", 0x00ff00, fields)
             
             await interaction.followup.send(embed=embed)
             
@@ -187,75 +258,58 @@ class TemplateManagementCog(commands.Cog):
             
     @app_commands.command(name="template_check", description="Check template availability on all nodes")
     @app_commands.describe(template_id="Template ID to check")
+    @require_permission("check templates")
     async def template_check(self, interaction: discord.Interaction, template_id: str):
         """Check template availability on all nodes"""
+        # Reject unknown templates before deferring
+        templates = self._settings.available_templates
+        if template_id not in templates:
+            await interaction.response.send_message(f"❌ Template '{template_id}' not found.", ephemeral=True)
+            return
+            
         await interaction.response.defer()
         
         try:
-            # Check permissions
-            if not self.bot.has_permission(interaction.user):
-                await interaction.followup.send("❌ You don't have permission to check templates.")
-                return
-                
-            templates = self.bot.database.settings.available_templates
-            
-            if template_id not in templates:
-                await interaction.followup.send(f"❌ Template '{template_id}' not found.")
-                return
-                
             template_info = templates[template_id]
             
-            # Check all nodes
-            nodes = await self.bot.proxmox.get_nodes()
+            # Check all nodes concurrently; a hung node must not hold up the reply
+            nodes = await self._pve.get_nodes()
+            storage = self._settings.default_storage
+            results = await asyncio.gather(
+                *(
+                    asyncio.wait_for(self._pve.get_template_volids(node["node"], storage), TEMPLATE_CHECK_TIMEOUT)
+                    for node in nodes
+                ),
+                return_exceptions=True
+            )
+            volid = f"{storage}:vztmpl/{template_info['template_file']}"
             available_nodes = []
             unavailable_nodes = []
             
-            for node in nodes:
-                try:
-                    storage = self.bot.database.settings.default_storage
-                    node_templates = await self.bot.proxmox.get_templates(node["node"], storage)
-                    
-                    template_available = any(
-                        template.get("volid") == template_info['template_file']
-                        for template in node_templates
-                    )
+            for node, volids in zip(nodes, results):
+                if isinstance(volids, asyncio.TimeoutError):
+                    logger.warning(f"Timed out checking template on node {node['node']}")
+                    unavailable_nodes.append(f"{node['node']} (Timeout)")
+                    continue
                     
-                    if template_available:
-                        available_nodes.append(node["node"])
-                    else:
-                        unavailable_nodes.append(node["node"])
-                        
-                except Exception as e:
-                    logger.warning(f"Failed to check template on node {node['node']}: {e}")
+                if isinstance(volids, Exception):
+                    logger.warning(f"Failed to check template on node {node['node']}: {volids}")
                     unavailable_nodes.append(f"{node['node']} (Error)")
+                    continue
+                    
+                if volid in volids:
+                    available_nodes.append(node["node"])
+                else:
+                    unavailable_nodes.append(node["node"])
             
-            embed = discord.Embed(
-                title=f"📦 Template Check: {template_info['name']}",
-                color=0x0099ff,
-                timestamp=datetime.utcnow()
-            )
-            
-            if available_nodes:
-                embed.add_field(
-                    name="✅ Available On",
-                    value="\n".join(available_nodes),
-                    inline=True
-                )
-            
-            if unavailable_nodes:
-                embed.add_field(
-                    name="❌ Not Available On",
-                    value="\n".join(unavailable_nodes),
-                    inline=True
-                )
-            
-            if not available_nodes and not unavailable_nodes:
-                embed.add_field(
-                    name="Status",
-                    value="No nodes checked",
-                    inline=False
-                )
+            # Large clusters are split over several fields instead of being truncated
+            fields = _line_fields("✅ Available On", available_nodes)
+            fields.extend(_line_fields("❌ Not Available On", unavailable_nodes))
             
+            if not fields:
+                fields.append({"name": "Status", "value": "No nodes checked", "inline": False})
+                
+            embed = build_embed(f"📦 Template Check: {template_info['name']}", 0x0099ff, fields)
             await interaction.followup.send(embed=embed)
             
         except Exception as e:
@@ -268,6 +322,7 @@ class TemplateManagementCog(commands.Cog):
         template_name="Name for the new template",
         description="Description for the template"
     )
+    @require_permission("create templates")
     async def template_create(
         self,
         interaction: discord.Interaction,
@@ -279,22 +334,17 @@ class TemplateManagementCog(commands.Cog):
         await interaction.response.defer()
         
         try:
-            # Check permissions
-            if not self.bot.has_permission(interaction.user):
-                await interaction.followup.send("❌ You don't have permission to create templates.")
-                return
-                
             # Check if user owns this VM
-            vm = await self.bot.database.get_vm_by_id(vmid)
+            vm = await self._db.get_vm_by_id(vmid)
             if not vm or vm["owner_id"] != interaction.user.id:
                 await interaction.followup.send("❌ VM not found or you don't own it.")
                 return
                 
             # Stop VM if running
-            status = await self.bot.proxmox.get_vm_status(vm["node"], vmid)
+            status = await self._pve.get_vm_status(vm["node"], vmid)
             if status.get("status") == "running":
-                await self.bot.proxmox.stop_vm(vm["node"], vmid)
-                await asyncio.sleep(5)  # Wait for VM to stop
+                await self._pve.stop_vm(vm["node"], vmid)
+                await self._wait_for_vm_stopped(vm["node"], vmid)
                 
             # Convert VM to template
             template_config = {
@@ -302,7 +352,7 @@ class TemplateManagementCog(commands.Cog):
                 "template": 1
             }
             
-            result = await self.bot.proxmox.update_vm_config(vm["node"], vmid, template_config)
+            result = await self._pve.update_vm_config(vm["node"], vmid, template_config)
             
             # Store template in database
             template_data = {
@@ -316,24 +366,24 @@ class TemplateManagementCog(commands.Cog):
                 "default_user": "root",
                 "ssh_port": 22,
                 "is_active": True,
-                "metadata": {
+                "template_metadata": {
                     "created_from_vm": vmid,
                     "created_by": interaction.user.id,
-                    "created_at": datetime.utcnow().isoformat()
+                    "created_at": discord.utils.utcnow().isoformat()
                 }
             }
             
-            await self.bot.database.create_template(template_data)
+            await self._db.create_template(template_data)
+            self._template_cache.pop(template_name, None)
             
-            embed = discord.Embed(
-                title="✅ Template Created",
-                color=0x00ff00,
-                timestamp=datetime.utcnow()
-            )
-            embed.add_field(name="Template Name", value=template_name, inline=True)
-            embed.add_field(name="Source VM", value=f"{vm['name']} (ID: {vmid})", inline=True)
-            embed.add_field(name="Node", value=vm["node"], inline=True)
-            embed.add_field(name="Description", value=description or "No description", inline=False)
+            fields = _spec_fields(_CREATE_FIELD_SPECS, {
+                "template_name": template_name,
+                "vm_name": vm["name"],
+                "vmid": vmid,
+                "node": vm["node"],
+                "description": description or "No description"
+            })
+            embed = build_embed("✅ Template Created", 0x00ff00, fields)
             
             await interaction.followup.send(embed=embed)
             
@@ -343,18 +393,14 @@ class TemplateManagementCog(commands.Cog):
             
     @app_commands.command(name="template_delete", description="Delete a custom template")
     @app_commands.describe(template_name="Name of the template to delete")
+    @require_permission("delete templates")
     async def template_delete(self, interaction: discord.Interaction, template_name: str):
         """Delete a custom template"""
         await interaction.response.defer()
         
         try:
-            # Check permissions
-            if not self.bot.has_permission(interaction.user):
-                await interaction.followup.send("❌ You don't have permission to delete templates.")
-                return
-                
             # Check if template exists
-            template = await self.bot.database.get_template_by_name(template_name)
+            template = await self._get_template(template_name)
             if not template:
                 await interaction.followup.send(f"❌ Template '{template_name}' not found.")
                 return
@@ -365,15 +411,11 @@ class TemplateManagementCog(commands.Cog):
                 return
                 
             # Delete template from database
-            await self.bot.database.delete_template(template_name)
+            await self._db.delete_template(template_name)
+            self._template_cache.pop(template_name, None)
             
-            embed = discord.Embed(
-                title="✅ Template Deleted",
-                color=0xff0000,
-                timestamp=datetime.utcnow()
-            )
-            embed.add_field(name="Template Name", value=template_name, inline=True)
-            embed.add_field(name="Status", value="Deleted", inline=True)
+            fields = _spec_fields(_DELETE_FIELD_SPECS, {"template_name": template_name})
+            embed = build_embed("✅ Template Deleted", 0xff0000, fields)
             
             await interaction.followup.send(embed=embed)
             
@@ -390,6 +432,7 @@ class TemplateManagementCog(commands.Cog):
         min_cores="New minimum cores requirement (optional)",
         min_disk="New minimum disk requirement (optional)"
     )
+    @require_permission("update templates")
     async def template_update(
         self,
         interaction: discord.Interaction,
@@ -404,13 +447,8 @@ class TemplateManagementCog(commands.Cog):
         await interaction.response.defer()
         
         try:
-            # Check permissions
-            if not self.bot.has_permission(interaction.user):
-                await interaction.followup.send("❌ You don't have permission to update templates.")
-                return
-                
             # Check if template exists
-            template = await self.bot.database.get_template_by_name(template_name)
+            template = await self._get_template(template_name)
             if not template:
                 await interaction.followup.send(f"❌ Template '{template_name}' not found.")
                 return
@@ -420,36 +458,34 @@ class TemplateManagementCog(commands.Cog):
                 await interaction.followup.send("❌ You can only update templates you created.")
                 return
                 
-            # Prepare update data
-            update_data = {}
-            if new_name:
-                update_data["name"] = new_name
-                update_data["display_name"] = new_name
-            if description is not None:
-                update_data["description"] = description
-            if min_memory is not None:
-                update_data["min_memory"] = min_memory
-            if min_cores is not None:
-                update_data["min_cores"] = min_cores
-            if min_disk is not None:
-                update_data["min_disk"] = min_disk
-                
+            # Prepare update data; an empty new name is ignored like before
+            new_name = new_name or None
+            updates = (
+                ("name", new_name),
+                ("display_name", new_name),
+                ("description", description),
+                ("min_memory", min_memory),
+                ("min_cores", min_cores),
+                ("min_disk", min_disk)
+            )
+            update_data = {key: value for key, value in updates if value is not None}
+            
             if not update_data:
                 await interaction.followup.send("❌ No updates provided.")
                 return
                 
             # Update template
-            await self.bot.database.update_template(template_name, update_data)
-            
-            embed = discord.Embed(
-                title="✅ Template Updated",
-                color=0x00ff00,
-                timestamp=datetime.utcnow()
+            await self._db.update_template(template_name, update_data)
+            self._template_cache.pop(template_name, None)
+            if new_name:
+                self._template_cache.pop(new_name, None)
+                
+            fields = [{"name": "Template", "value": template_name, "inline": True}]
+            fields.extend(
+                {"name": key.replace("_", " ").title(), "value": str(value), "inline": True}
+                for key, value in update_data.items()
             )
-            embed.add_field(name="Template", value=template_name, inline=True)
-            
-            for key, value in update_data.items():
-                embed.add_field(name=key.replace("_", " ").title(), value=str(value), inline=True)
+            embed = build_embed("✅ Template Updated", 0x00ff00, fields)
             
             await interaction.followup.send(embed=embed)
             
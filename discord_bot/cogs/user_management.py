@@ -5,13 +5,68 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import asyncio
+import gzip
+import io
 import logging
-from typing import Optional, List, Dict, Any
+from collections import Counter
+from typing import Optional, List, Dict, Any, Awaitable
 from datetime import datetime, timedelta
-import json
+import orjson
+
+from discord_bot.embeds import description_embeds, new_embed, send_embeds
 
 logger = logging.getLogger(__name__)
 
+# Seconds a command waits for any single database call
+DB_TIMEOUT = 10
+
+# Number of deployments shown as recent activity by user_info
+RECENT_ACTIVITY_LIMIT = 5
+
+# Age after which user_cleanup removes deployments and audit logs
+DEPLOYMENT_RETENTION = timedelta(days=30)
+AUDIT_LOG_RETENTION = timedelta(days=90)
+
+# Status -> emoji; unknown deployment statuses show as failed, VMs as stopped
+_DEPLOYMENT_STATUS_EMOJI = {"completed": "✅", "in_progress": "⏳"}
+_VM_STATUS_EMOJI = {"running": "🟢"}
+
+# Markdown entries listed by user_vms and user_deployments, filled from the row dicts
+_FMT_VM_ENTRY = (
+    "__{emoji} {name} (ID: {vm_id})__\n"
+    "**Template:** {template}\n"
+    "**Resources:** {memory}MB RAM, {cores} cores, {disk_size}GB disk\n"
+    "**Node:** {node}\n"
+    "**IP:** {ip_address}\n"
+    "**Uptime:** {uptime}\n"
+    "**Created:** {created_at:%Y-%m-%d %H:%M}"
+).format_map
+_FMT_DEPLOYMENT_ENTRY = (
+    "__{emoji} {deployment_type} - {created_at:%Y-%m-%d %H:%M}__\n"
+    "**Status:** {status}\n"
+    "**Progress:** {progress}%\n"
+    "**VM ID:** {vm_id}\n"
+    "**Error:** {error_message}"
+).format_map
+
+# orjson options for the user_export file
+_EXPORT_JSON_OPTIONS = orjson.OPT_NAIVE_UTC
+
+# Prebuilt embed payloads for the replies
+_USER_INFO_TEMPLATE = {"color": 0x0099ff}
+_USER_VMS_TEMPLATE = {"title": "🖥️ Your Virtual Machines", "color": 0x0099ff}
+_USER_DEPLOYMENTS_TEMPLATE = {"title": "🚀 Your Deployments", "color": 0x0099ff}
+_USER_STATS_TEMPLATE = {"title": "📊 Your Usage Statistics", "color": 0x0099ff}
+_USER_CLEANUP_TEMPLATE = {"title": "✅ Cleanup Completed", "color": 0x00ff00}
+_USER_EXPORT_TEMPLATE = {"title": "📤 VM Export Complete", "color": 0x00ff00}
+
+async def _db(awaitable: Awaitable[Any]) -> Any:
+    """Await a database call, failing the command instead of hanging if it stalls"""
+    try:
+        return await asyncio.wait_for(awaitable, DB_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise Exception(f"Database did not respond within {DB_TIMEOUT} seconds") from None
+
 class UserManagementCog(commands.Cog):
     """User Management commands"""
     
@@ -24,8 +79,12 @@ class UserManagementCog(commands.Cog):
         await interaction.response.defer()
         
         try:
-            # Get user from database
-            user = await self.bot.database.get_user(interaction.user.id)
+            # Get the user, their VMs and recent deployments concurrently
+            user, vms, recent_deployments = await asyncio.gather(
+                _db(self.bot.database.get_user(interaction.user.id)),
+                _db(self.bot.vm_cache.get_user_vms(interaction.user.id)),
+                _db(self.bot.database.get_user_deployments(interaction.user.id, RECENT_ACTIVITY_LIMIT))
+            )
             
             if not user:
                 # Create user if doesn't exist
@@ -36,29 +95,18 @@ class UserManagementCog(commands.Cog):
                     "is_admin": self.bot.is_admin(interaction.user.id),
                     "is_active": True
                 }
-                user = await self.bot.database.create_user(user_data)
-            
-            # Get user's VMs
-            vms = await self.bot.database.get_user_vms(interaction.user.id)
-            
-            # Get user's deployments
-            deployments = await self.bot.database.get_user_deployments(interaction.user.id)
+                user = await _db(self.bot.database.create_user(user_data))
             
-            # Calculate statistics
+            # Calculate statistics in a single pass
             total_vms = len(vms)
-            running_vms = len([vm for vm in vms if vm["status"] == "running"])
-            total_memory = sum(vm["memory"] for vm in vms)
-            total_cores = sum(vm["cores"] for vm in vms)
-            total_disk = sum(vm["disk_size"] for vm in vms)
-            
-            # Get recent activity
-            recent_deployments = deployments[-5:] if deployments else []
-            
-            embed = discord.Embed(
-                title=f"👤 User Information: {user['username']}",
-                color=0x0099ff,
-                timestamp=datetime.utcnow()
-            )
+            running_vms = total_memory = total_cores = total_disk = 0
+            for vm in vms:
+                running_vms += vm["status"] == "running"
+                total_memory += vm["memory"]
+                total_cores += vm["cores"]
+                total_disk += vm["disk_size"]
+            
+            embed = new_embed(_USER_INFO_TEMPLATE, title=f"👤 User Information: {user['username']}")
             
             # Basic info
             embed.add_field(name="Discord ID", value=str(user["discord_id"]), inline=True)
@@ -81,10 +129,11 @@ class UserManagementCog(commands.Cog):
             
             # Recent activity
             if recent_deployments:
-                activity_text = ""
-                for deployment in recent_deployments:
-                    status_emoji = "✅" if deployment["status"] == "completed" else "⏳" if deployment["status"] == "in_progress" else "❌"
-                    activity_text += f"{status_emoji} {deployment['deployment_type']} - {deployment['created_at'].strftime('%m/%d %H:%M')}\n"
+                activity_text = "\n".join(
+                    f"{_DEPLOYMENT_STATUS_EMOJI.get(deployment['status'], '❌')} "
+                    f"{deployment['deployment_type']} - {deployment['created_at']:%m/%d %H:%M}"
+                    for deployment in recent_deployments
+                )
                 
                 embed.add_field(
                     name="📈 Recent Activity",
@@ -119,48 +168,47 @@ class UserManagementCog(commands.Cog):
         await interaction.response.defer()
         
         try:
-            # Get user's VMs
-            vms = await self.bot.database.get_user_vms(interaction.user.id)
-            
+            # Live statuses and uptimes of every cluster VM come from one Proxmox request
+            vms, resources = await asyncio.gather(
+                _db(self.bot.vm_cache.get_user_vms(interaction.user.id)),
+                self.bot.proxmox.get_cluster_resources("vm"),
+                return_exceptions=True
+            )
+            if isinstance(vms, Exception):
+                raise vms
+                
             if not vms:
                 await interaction.followup.send("📝 You don't have any VMs yet.")
                 return
                 
-            embed = discord.Embed(
-                title="🖥️ Your Virtual Machines",
-                color=0x0099ff,
-                timestamp=datetime.utcnow()
-            )
+            if isinstance(resources, Exception):
+                logger.warning(f"Failed to get live VM statuses, using stored ones: {resources}")
+                resources = []
+            status_by_id = {resource.get("vmid"): resource for resource in resources}
             
+            # One Markdown entry per VM; the 25-field limit would cut long lists short
+            entries = []
             for vm in vms:
-                status_emoji = "🟢" if vm["status"] == "running" else "🔴"
+                status = status_by_id.get(vm["vm_id"], {})
+                status_emoji = _VM_STATUS_EMOJI.get(status.get("status", vm["status"]), "🔴")
                 
                 # Get uptime if running
                 uptime_text = "N/A"
-                if vm["status"] == "running":
-                    try:
-                        status = await self.bot.proxmox.get_vm_status(vm["node"], vm["vm_id"])
-                        if status.get("uptime"):
-                            uptime_seconds = status["uptime"]
-                            uptime_days = uptime_seconds // 86400
-                            uptime_hours = (uptime_seconds % 86400) // 3600
-                            uptime_minutes = (uptime_seconds % 3600) // 60
-                            uptime_text = f"{uptime_days}d {uptime_hours}h {uptime_minutes}m"
-                    except Exception as e:
-                        logger.warning(f"Failed to get uptime for VM {vm['vm_id']}: {e}")
+                if status.get("uptime"):
+                    uptime_seconds = status["uptime"]
+                    uptime_days = uptime_seconds // 86400
+                    uptime_hours = (uptime_seconds % 86400) // 3600
+                    uptime_minutes = (uptime_seconds % 3600) // 60
+                    uptime_text = f"{uptime_days}d {uptime_hours}h {uptime_minutes}m"
                 
-                embed.add_field(
-                    name=f"{status_emoji} {vm['name']} (ID: {vm['vm_id']})",
-                    value=f"**Template:** {vm['template']}\n"
-                          f"**Resources:** {vm['memory']}MB RAM, {vm['cores']} cores, {vm['disk_size']}GB disk\n"
-                          f"**Node:** {vm['node']}\n"
-                          f"**IP:** {vm.get('ip_address', 'Not assigned')}\n"
-                          f"**Uptime:** {uptime_text}\n"
-                          f"**Created:** {vm['created_at'].strftime('%Y-%m-%d %H:%M')}",
-                    inline=False
-                )
+                entries.append(_FMT_VM_ENTRY({
+                    **vm,
+                    "emoji": status_emoji,
+                    "ip_address": vm.get("ip_address", "Not assigned"),
+                    "uptime": uptime_text
+                }))
                 
-            await interaction.followup.send(embed=embed)
+            await send_embeds(interaction, description_embeds(_USER_VMS_TEMPLATE, entries))
             
         except Exception as e:
             logger.error(f"Error getting user VMs: {e}")
@@ -174,31 +222,25 @@ class UserManagementCog(commands.Cog):
         
         try:
             # Get user's deployments
-            deployments = await self.bot.database.get_user_deployments(interaction.user.id, limit)
+            deployments = await _db(self.bot.database.get_user_deployments(interaction.user.id, limit))
             
             if not deployments:
                 await interaction.followup.send("📝 No deployments found.")
                 return
                 
-            embed = discord.Embed(
-                title="🚀 Your Deployments",
-                color=0x0099ff,
-                timestamp=datetime.utcnow()
-            )
-            
+            # One Markdown entry per deployment; the 25-field limit would cut long histories short
+            entries = []
             for deployment in deployments:
-                status_emoji = "✅" if deployment["status"] == "completed" else "⏳" if deployment["status"] == "in_progress" else "❌"
+                status_emoji = _DEPLOYMENT_STATUS_EMOJI.get(deployment["status"], "❌")
                 
-                embed.add_field(
-                    name=f"{status_emoji} {deployment['deployment_type']} - {deployment['created_at'].strftime('%Y-%m-%d %H:%M')}",
-                    value=f"**Status:** {deployment['status']}\n"
-                          f"**Progress:** {deployment['progress']}%\n"
-                          f"**VM ID:** {deployment.get('vm_id', 'N/A')}\n"
-                          f"**Error:** {deployment.get('error_message', 'None')}",
-                    inline=False
-                )
+                entries.append(_FMT_DEPLOYMENT_ENTRY({
+                    **deployment,
+                    "emoji": status_emoji,
+                    "vm_id": deployment.get("vm_id", "N/A"),
+                    "error_message": deployment.get("error_message", "None")
+                }))
                 
-            await interaction.followup.send(embed=embed)
+            await send_embeds(interaction, description_embeds(_USER_DEPLOYMENTS_TEMPLATE, entries))
             
         except Exception as e:
             logger.error(f"Error getting user deployments: {e}")
@@ -210,44 +252,37 @@ class UserManagementCog(commands.Cog):
         await interaction.response.defer()
         
         try:
-            # Get user's VMs
-            vms = await self.bot.database.get_user_vms(interaction.user.id)
-            
-            # Get user's deployments
-            deployments = await self.bot.database.get_user_deployments(interaction.user.id)
+            # Get user's VMs and deployments concurrently
+            vms, deployments = await asyncio.gather(
+                _db(self.bot.vm_cache.get_user_vms(interaction.user.id)),
+                _db(self.bot.vm_cache.get_user_deployments(interaction.user.id))
+            )
             
-            # Calculate statistics
+            # Aggregate VM statistics and template/node usage in a single pass
+            vm_status_counts = Counter()
+            template_usage = Counter()
+            node_usage = Counter()
+            total_memory = total_cores = total_disk = 0
+            for vm in vms:
+                vm_status_counts[vm["status"]] += 1
+                template_usage[vm["template"]] += 1
+                node_usage[vm["node"]] += 1
+                total_memory += vm["memory"]
+                total_cores += vm["cores"]
+                total_disk += vm["disk_size"]
+                
             total_vms = len(vms)
-            running_vms = len([vm for vm in vms if vm["status"] == "running"])
-            stopped_vms = len([vm for vm in vms if vm["status"] == "stopped"])
-            
-            total_memory = sum(vm["memory"] for vm in vms)
-            total_cores = sum(vm["cores"] for vm in vms)
-            total_disk = sum(vm["disk_size"] for vm in vms)
+            running_vms = vm_status_counts["running"]
+            stopped_vms = vm_status_counts["stopped"]
             
             # Deployment statistics
+            deployment_status_counts = Counter(d["status"] for d in deployments)
             total_deployments = len(deployments)
-            completed_deployments = len([d for d in deployments if d["status"] == "completed"])
-            failed_deployments = len([d for d in deployments if d["status"] == "failed"])
-            in_progress_deployments = len([d for d in deployments if d["status"] == "in_progress"])
-            
-            # VM template usage
-            template_usage = {}
-            for vm in vms:
-                template = vm["template"]
-                template_usage[template] = template_usage.get(template, 0) + 1
+            completed_deployments = deployment_status_counts["completed"]
+            failed_deployments = deployment_status_counts["failed"]
+            in_progress_deployments = deployment_status_counts["in_progress"]
             
-            # Node usage
-            node_usage = {}
-            for vm in vms:
-                node = vm["node"]
-                node_usage[node] = node_usage.get(node, 0) + 1
-            
-            embed = discord.Embed(
-                title="📊 Your Usage Statistics",
-                color=0x0099ff,
-                timestamp=datetime.utcnow()
-            )
+            embed = new_embed(_USER_STATS_TEMPLATE)
             
             # VM statistics
             embed.add_field(
@@ -262,13 +297,14 @@ class UserManagementCog(commands.Cog):
             )
             
             # Deployment statistics
+            success_rate = f"{completed_deployments / total_deployments * 100:.1f}%" if total_deployments else "N/A"
             embed.add_field(
                 name="🚀 Deployment Statistics",
                 value=f"**Total Deployments:** {total_deployments}\n"
                       f"**Completed:** {completed_deployments}\n"
                       f"**Failed:** {failed_deployments}\n"
                       f"**In Progress:** {in_progress_deployments}\n"
-                      f"**Success Rate:** {(completed_deployments/total_deployments*100):.1f}%" if total_deployments > 0 else "N/A",
+                      f"**Success Rate:** {success_rate}",
                 inline=True
             )
             
@@ -317,19 +353,15 @@ class UserManagementCog(commands.Cog):
                 await interaction.followup.send("❌ You don't have permission to perform cleanup.")
                 return
                 
-            # Clean up old deployments (older than 30 days)
-            cutoff_date = datetime.utcnow() - timedelta(days=30)
-            cleaned_deployments = await self.bot.database.cleanup_old_deployments(interaction.user.id, cutoff_date)
-            
-            # Clean up old audit logs (older than 90 days)
-            audit_cutoff_date = datetime.utcnow() - timedelta(days=90)
-            cleaned_audit_logs = await self.bot.database.cleanup_old_audit_logs(interaction.user.id, audit_cutoff_date)
-            
-            embed = discord.Embed(
-                title="✅ Cleanup Completed",
-                color=0x00ff00,
-                timestamp=datetime.utcnow()
+            # Clean up old deployments and audit logs concurrently; they live in different tables
+            now = datetime.utcnow()
+            cleaned_deployments, cleaned_audit_logs = await asyncio.gather(
+                _db(self.bot.database.cleanup_old_deployments(interaction.user.id, now - DEPLOYMENT_RETENTION)),
+                _db(self.bot.database.cleanup_old_audit_logs(interaction.user.id, now - AUDIT_LOG_RETENTION))
             )
+            self.bot.vm_cache.invalidate_user(interaction.user.id)
+            
+            embed = new_embed(_USER_CLEANUP_TEMPLATE)
             embed.add_field(name="Old Deployments Removed", value=str(cleaned_deployments), inline=True)
             embed.add_field(name="Old Audit Logs Removed", value=str(cleaned_audit_logs), inline=True)
             embed.add_field(name="Status", value="Cleanup completed successfully", inline=True)
@@ -347,55 +379,57 @@ class UserManagementCog(commands.Cog):
         
         try:
             # Get user's VMs
-            vms = await self.bot.database.get_user_vms(interaction.user.id)
+            vms = await _db(self.bot.database.get_user_vms(interaction.user.id))
             
             if not vms:
                 await interaction.followup.send("📝 No VMs to export.")
                 return
                 
-            # Create export data
-            export_data = {
-                "user": {
-                    "discord_id": str(interaction.user.id),
-                    "username": interaction.user.name,
-                    "export_date": datetime.utcnow().isoformat()
-                },
-                "vms": []
+            # Stream the export into a gzip buffer one VM per line, so neither the
+            # whole document nor its uncompressed bytes are held in memory
+            export_user = {
+                "discord_id": str(interaction.user.id),
+                "username": interaction.user.name,
+                "export_date": datetime.utcnow()
             }
-            
-            for vm in vms:
-                vm_data = {
-                    "name": vm["name"],
-                    "vm_id": vm["vm_id"],
-                    "template": vm["template"],
-                    "memory": vm["memory"],
-                    "cores": vm["cores"],
-                    "disk_size": vm["disk_size"],
-                    "node": vm["node"],
-                    "storage": vm["storage"],
-                    "network_bridge": vm["network_bridge"],
-                    "ip_address": vm.get("ip_address"),
-                    "mac_address": vm.get("mac_address"),
-                    "ssh_port": vm.get("ssh_port"),
-                    "created_at": vm["created_at"].isoformat(),
-                    "last_modified": vm["last_modified"].isoformat()
-                }
-                export_data["vms"].append(vm_data)
-            
-            # Create JSON file
-            json_data = json.dumps(export_data, indent=2)
+            buffer = io.BytesIO()
+            with gzip.GzipFile(fileobj=buffer, mode="wb", compresslevel=6, mtime=0) as export_file:
+                export_file.write(b'{"user":')
+                export_file.write(orjson.dumps(export_user, default=str, option=_EXPORT_JSON_OPTIONS))
+                export_file.write(b',"vms":[\n')
+                
+                for index, vm in enumerate(vms):
+                    vm_data = {
+                        "name": vm["name"],
+                        "vm_id": vm["vm_id"],
+                        "template": vm["template"],
+                        "memory": vm["memory"],
+                        "cores": vm["cores"],
+                        "disk_size": vm["disk_size"],
+                        "node": vm["node"],
+                        "storage": vm["storage"],
+                        "network_bridge": vm["network_bridge"],
+                        "ip_address": vm.get("ip_address"),
+                        "mac_address": vm.get("mac_address"),
+                        "ssh_port": vm.get("ssh_port"),
+                        "created_at": vm["created_at"],
+                        "last_modified": vm["last_modified"]
+                    }
+                    if index:
+                        export_file.write(b",\n")
+                    export_file.write(orjson.dumps(vm_data, default=str, option=_EXPORT_JSON_OPTIONS))
+                    
+                export_file.write(b"\n]}\n")
+                
+            buffer.seek(0)
             
             # Create file attachment
             file = discord.File(
-                io.BytesIO(json_data.encode()),
-                filename=f"vm_export_{interaction.user.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+                buffer,
+                filename=f"vm_export_{interaction.user.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json.gz"
             )
             
-            embed = discord.Embed(
-                title="📤 VM Export Complete",
-                color=0x00ff00,
-                timestamp=datetime.utcnow()
-            )
+            embed = new_embed(_USER_EXPORT_TEMPLATE)
             embed.add_field(name="VMs Exported", value=str(len(vms)), inline=True)
             embed.add_field(name="File Name", value=file.filename, inline=True)
             embed.add_field(name="Status", value="Export completed successfully", inline=True)
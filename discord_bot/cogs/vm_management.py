@@ -6,17 +6,153 @@ from discord.ext import commands
 from discord import app_commands
 import asyncio
 import logging
-from typing import Optional, List, Dict, Any
-from datetime import datetime
+import weakref
+from typing import Optional, List, Dict, Any, Set
 import json
 
 logger = logging.getLogger(__name__)
 
+# Create and clone tasks are watched in the background; the watch ends well
+# inside the 15 minute lifetime of the interaction's followup webhook
+TASK_POLL_INTERVAL = 3
+TASK_WATCH_TIMEOUT = 600
+
+# Most VMs vm_create_batch creates in one command
+MAX_BATCH_VMS = 10
+
+# Tries vm_create_batch gives each VM when another VM takes its ID first
+VMID_ATTEMPTS = 3
+
+# Most VMs shown by vm_list
+VM_LIST_LIMIT = 10
+
+# Embed description templates for vm_list entries and vm_info, filled from VM records
+_FMT_VM_LINE = "{emoji} **{name}** `{vm_id}` — {memory}MB/{cores}c/{disk_size}GB — {template} on {node} — IP {ip_address}".format_map
+_FMT_VM_INFO = (
+    "**VM ID:** {vm_id}\n"
+    "**Status:** {status}\n"
+    "**Node:** {node}\n"
+    "**Template:** {template}\n"
+    "**Memory:** {memory} MB\n"
+    "**CPU Cores:** {cores}\n"
+    "**Disk Size:** {disk_size} GB\n"
+    "**IP Address:** {ip_address}\n"
+    "**MAC Address:** {mac_address}\n"
+    "**Created:** {created_at:%Y-%m-%d %H:%M:%S}\n"
+    "**Last Modified:** {last_modified:%Y-%m-%d %H:%M:%S}"
+).format_map
+_FMT_UPTIME = "\n**Uptime:** {}d {}h {}m".format
+
+# Defaults for VM resources not given to vm_create or vm_create_batch
+DEFAULT_MEMORY = 2048
+DEFAULT_CORES = 2
+DEFAULT_DISK = 32
+
+def _check_resources(template_info: Dict[str, Any], memory: int, cores: int, disk: int) -> Optional[str]:
+    """Return why the resources are below the template's minimums, or None"""
+    if memory < template_info["min_memory"]:
+        return f"Memory must be at least {template_info['min_memory']} MB"
+    if cores < template_info["min_cores"]:
+        return f"Cores must be at least {template_info['min_cores']}"
+    if disk < template_info["min_disk"]:
+        return f"Disk must be at least {template_info['min_disk']} GB"
+    return None
+
 class VMManagementCog(commands.Cog):
     """VM Management commands"""
     
     def __init__(self, bot):
         self.bot = bot
+        # Cogs are loaded once the database exists; its settings are loaded once at startup
+        self._settings = bot.database.settings
+        # Parts of new VM configs and records that only depend on those settings
+        self._scsi0_prefix = f"{self._settings.default_storage}:"
+        self._vm_config_base = {
+            "net0": f"virtio,bridge={self._settings.default_network_bridge}",
+            "ostype": "l26"
+        }
+        self._vm_record_base = {
+            "storage": self._settings.default_storage,
+            "network_bridge": self._settings.default_network_bridge
+        }
+        # Commands changing the same VM run one at a time; a lock is dropped once
+        # no command holds or waits on it, so unknown VM IDs leave nothing behind
+        self._vm_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self._task_watchers: Set[asyncio.Task] = set()
+        
+    async def cog_unload(self):
+        """Stop watching Proxmox tasks"""
+        for watcher in self._task_watchers:
+            watcher.cancel()
+            
+    def _vm_lock(self, vmid: int) -> asyncio.Lock:
+        """Get the lock serializing commands on a VM"""
+        lock = self._vm_locks.get(vmid)
+        if lock is None:
+            lock = self._vm_locks[vmid] = asyncio.Lock()
+        return lock
+        
+    def _watch_task(self, interaction: discord.Interaction, node: str, upid: Any, action: str):
+        """Report the outcome of a Proxmox task once it finishes, without holding up the command"""
+        if not isinstance(upid, str) or not upid.startswith("UPID:"):
+            return
+        watcher = asyncio.create_task(self._report_task(interaction, node, upid, action))
+        self._task_watchers.add(watcher)
+        watcher.add_done_callback(self._task_watchers.discard)
+        
+    async def _report_task(self, interaction: discord.Interaction, node: str, upid: str, action: str):
+        """Poll a Proxmox task and send a followup when it has finished"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + TASK_WATCH_TIMEOUT
+        try:
+            while loop.time() < deadline:
+                await asyncio.sleep(TASK_POLL_INTERVAL)
+                status = await self.bot.proxmox.get_task_status(node, upid)
+                if status.get("status") != "stopped":
+                    continue
+                    
+                exitstatus = status.get("exitstatus", "unknown error")
+                if exitstatus == "OK":
+                    await interaction.followup.send(f"✅ {action} finished.")
+                else:
+                    logger.error(f"Proxmox task {upid} failed: {exitstatus}")
+                    await interaction.followup.send(f"❌ {action} failed: {exitstatus}")
+                return
+                
+            logger.warning(f"Stopped watching Proxmox task {upid} after {TASK_WATCH_TIMEOUT} seconds")
+            
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Failed to watch Proxmox task {upid}: {e}")
+            
+    def _vm_config(self, vmid: int, name: str, memory: int, cores: int, disk: int, template_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the Proxmox configuration of a new VM"""
+        config = self._vm_config_base.copy()
+        config.update(
+            vmid=vmid,
+            name=name,
+            memory=memory,
+            cores=cores,
+            scsi0=self._scsi0_prefix + str(disk),
+            template=template_info["template_file"]
+        )
+        return config
+        
+    def _vm_record(self, vmid: int, name: str, template: str, memory: int, cores: int, disk: int, node: str, vm_config: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the database record of a new VM"""
+        record = self._vm_record_base.copy()
+        record.update(
+            vm_id=vmid,
+            name=name,
+            template=template,
+            memory=memory,
+            cores=cores,
+            disk_size=disk,
+            node=node,
+            proxmox_config=vm_config
+        )
+        return record
         
     @app_commands.command(name="vm_create", description="Create a new virtual machine")
     @app_commands.describe(
@@ -32,9 +168,9 @@ class VMManagementCog(commands.Cog):
         interaction: discord.Interaction,
         name: str,
         template: str,
-        memory: Optional[int] = 2048,
-        cores: Optional[int] = 2,
-        disk: Optional[int] = 32,
+        memory: Optional[int] = DEFAULT_MEMORY,
+        cores: Optional[int] = DEFAULT_CORES,
+        disk: Optional[int] = DEFAULT_DISK,
         node: Optional[str] = None
     ):
         """Create a new virtual machine"""
@@ -47,23 +183,17 @@ class VMManagementCog(commands.Cog):
                 return
                 
             # Validate template
-            if template not in self.bot.database.settings.available_templates:
+            templates = self._settings.available_templates
+            if template not in templates:
                 await interaction.followup.send(f"❌ Invalid template: {template}")
                 return
                 
-            template_info = self.bot.database.settings.available_templates[template]
+            template_info = templates[template]
             
             # Validate resources
-            if memory < template_info["min_memory"]:
-                await interaction.followup.send(f"❌ Memory must be at least {template_info['min_memory']} MB")
-                return
-                
-            if cores < template_info["min_cores"]:
-                await interaction.followup.send(f"❌ Cores must be at least {template_info['min_cores']}")
-                return
-                
-            if disk < template_info["min_disk"]:
-                await interaction.followup.send(f"❌ Disk must be at least {template_info['min_disk']} GB")
+            problem = _check_resources(template_info, memory, cores, disk)
+            if problem:
+                await interaction.followup.send(f"❌ {problem}")
                 return
                 
             # Get available nodes
@@ -78,40 +208,21 @@ class VMManagementCog(commands.Cog):
             vmid = await self.bot.proxmox.get_next_vmid()
             
             # Create VM configuration
-            vm_config = {
-                "vmid": vmid,
-                "name": name,
-                "memory": memory,
-                "cores": cores,
-                "net0": f"virtio,bridge={self.bot.database.settings.default_network_bridge}",
-                "scsi0": f"{self.bot.database.settings.default_storage}:{disk}",
-                "ostype": "l26",
-                "template": template_info["template_file"]
-            }
+            vm_config = self._vm_config(vmid, name, memory, cores, disk, template_info)
             
             # Create VM
             result = await self.bot.proxmox.create_vm(node, vmid, vm_config)
             
             # Store in database
-            vm_data = {
-                "vm_id": vmid,
-                "name": name,
-                "template": template,
-                "memory": memory,
-                "cores": cores,
-                "disk_size": disk,
-                "node": node,
-                "storage": self.bot.database.settings.default_storage,
-                "network_bridge": self.bot.database.settings.default_network_bridge,
-                "proxmox_config": vm_config
-            }
+            vm_data = self._vm_record(vmid, name, template, memory, cores, disk, node, vm_config)
             
             await self.bot.database.create_vm(interaction.user.id, vm_data)
+            self.bot.vm_cache.invalidate_user(interaction.user.id)
             
             embed = discord.Embed(
                 title="✅ VM Created Successfully",
                 color=0x00ff00,
-                timestamp=datetime.utcnow()
+                timestamp=discord.utils.utcnow()
             )
             embed.add_field(name="Name", value=name, inline=True)
             embed.add_field(name="VM ID", value=str(vmid), inline=True)
@@ -120,45 +231,183 @@ class VMManagementCog(commands.Cog):
             embed.add_field(name="Cores", value=str(cores), inline=True)
             embed.add_field(name="Disk", value=f"{disk} GB", inline=True)
             embed.add_field(name="Node", value=node, inline=True)
-            embed.add_field(name="Status", value="Stopped", inline=True)
+            embed.add_field(name="Status", value="Creating...", inline=True)
             
             await interaction.followup.send(embed=embed)
+            self._watch_task(interaction, node, result, f"Creating VM {name} ({vmid})")
             
         except Exception as e:
             logger.error(f"Error creating VM: {e}")
             await interaction.followup.send(f"❌ Failed to create VM: {str(e)}")
             
+    @app_commands.command(name="vm_create_batch", description="Create several virtual machines at once")
+    @app_commands.describe(
+        specs='JSON list of VMs, e.g. [{"name": "web1", "template": "ubuntu-22.04", "memory": 2048}]',
+        node="Proxmox node for all VMs (optional)"
+    )
+    async def vm_create_batch(self, interaction: discord.Interaction, specs: str, node: Optional[str] = None):
+        """Create several virtual machines concurrently"""
+        await interaction.response.defer()
+        
+        try:
+            # Check permissions
+            if not self.bot.has_permission(interaction.user):
+                await interaction.followup.send("❌ You don't have permission to create VMs.")
+                return
+                
+            try:
+                vm_specs = json.loads(specs)
+            except ValueError as e:
+                await interaction.followup.send(f"❌ Invalid VM list: {e}")
+                return
+                
+            if not isinstance(vm_specs, list) or not vm_specs or not all(isinstance(spec, dict) for spec in vm_specs):
+                await interaction.followup.send("❌ The VM list must be a non-empty JSON list of objects.")
+                return
+                
+            if len(vm_specs) > MAX_BATCH_VMS:
+                await interaction.followup.send(f"❌ At most {MAX_BATCH_VMS} VMs can be created at once.")
+                return
+                
+            # Validate every VM before creating any of them
+            templates = self._settings.available_templates
+            requests = []
+            for index, spec in enumerate(vm_specs, 1):
+                name = spec.get("name")
+                template = spec.get("template")
+                if not name or template not in templates:
+                    await interaction.followup.send(f"❌ VM {index}: a name and a valid template are required.")
+                    return
+                    
+                memory = spec.get("memory", DEFAULT_MEMORY)
+                cores = spec.get("cores", DEFAULT_CORES)
+                disk = spec.get("disk", DEFAULT_DISK)
+                # bool is an int subclass, but true/false are not sizes
+                if not all(isinstance(value, int) and not isinstance(value, bool) for value in (memory, cores, disk)):
+                    await interaction.followup.send(f"❌ VM {index} ({name}): memory, cores and disk must be whole numbers.")
+                    return
+                    
+                problem = _check_resources(templates[template], memory, cores, disk)
+                if problem:
+                    await interaction.followup.send(f"❌ VM {index} ({name}): {problem}")
+                    return
+                requests.append((name, template, memory, cores, disk))
+                
+            if not node:
+                nodes = await self.bot.proxmox.get_nodes()
+                if not nodes:
+                    await interaction.followup.send("❌ No available nodes found")
+                    return
+                node = nodes[0]["node"]
+                
+            # Proxmox only promises that the ID nextid returns is free, so each
+            # VM gets its own ID, skipping ones in use or taken by this batch
+            taken = set()
+            allocation_lock = asyncio.Lock()
+            
+            async def allocate_vmid():
+                async with allocation_lock:
+                    vmid = await self.bot.proxmox.get_next_vmid()
+                    while vmid in taken or await self.bot.proxmox.check_vmid_exists(vmid):
+                        vmid += 1
+                    taken.add(vmid)
+                    return vmid
+                    
+            async def create(name, template, memory, cores, disk):
+                for attempt in range(VMID_ATTEMPTS):
+                    vmid = await allocate_vmid()
+                    vm_config = self._vm_config(vmid, name, memory, cores, disk, templates[template])
+                    try:
+                        await self.bot.proxmox.create_vm(node, vmid, vm_config)
+                    except Exception as e:
+                        # Another command created a VM with this ID in the meantime
+                        if "already exists" in str(e) and attempt + 1 < VMID_ATTEMPTS:
+                            logger.warning(f"VM ID {vmid} was taken while creating {name}, retrying")
+                            continue
+                        raise
+                    return vmid, self._vm_record(vmid, name, template, memory, cores, disk, node, vm_config)
+                    
+            # Create all VMs concurrently, then record the ones Proxmox accepted
+            results = await asyncio.gather(*(create(*request) for request in requests), return_exceptions=True)
+            
+            created = []
+            failed = []
+            for (name, *_), result in zip(requests, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error creating VM {name}: {result}")
+                    failed.append(f"{name}: {result}")
+                else:
+                    vmid, vm_data = result
+                    created.append((vmid, name, vm_data))
+                    
+            await asyncio.gather(*(self.bot.database.create_vm(interaction.user.id, vm_data) for _, _, vm_data in created))
+            self.bot.vm_cache.invalidate_user(interaction.user.id)
+            
+            embed = discord.Embed(
+                title="✅ VMs Created" if not failed else "⚠️ VMs Partially Created",
+                color=0x00ff00 if not failed else 0xff9900,
+                timestamp=discord.utils.utcnow()
+            )
+            embed.add_field(name="Node", value=node, inline=True)
+            embed.add_field(name="Created", value=str(len(created)), inline=True)
+            embed.add_field(name="Failed", value=str(len(failed)), inline=True)
+            if created:
+                embed.add_field(
+                    name="New VMs",
+                    value="\n".join(f"{name} (ID: {vmid})" for vmid, name, _ in created)[:1024],
+                    inline=False
+                )
+            if failed:
+                embed.add_field(name="Errors", value="\n".join(failed)[:1024], inline=False)
+                
+            await interaction.followup.send(embed=embed)
+            
+        except Exception as e:
+            logger.error(f"Error creating VMs: {e}")
+            await interaction.followup.send(f"❌ Failed to create VMs: {str(e)}")
+            
     @app_commands.command(name="vm_list", description="List all your virtual machines")
     async def vm_list(self, interaction: discord.Interaction):
         """List all virtual machines"""
         await interaction.response.defer()
         
         try:
-            vms = await self.bot.database.get_user_vms(interaction.user.id)
-            
+            # Live statuses of every cluster VM come from one Proxmox request
+            vms, resources = await asyncio.gather(
+                self.bot.database.get_user_vms(interaction.user.id),
+                self.bot.proxmox.get_cluster_resources("vm"),
+                return_exceptions=True
+            )
+            if isinstance(vms, Exception):
+                raise vms
+                
             if not vms:
                 await interaction.followup.send("📝 You don't have any VMs yet.")
                 return
                 
+            if isinstance(resources, Exception):
+                logger.warning(f"Failed to get live VM statuses, using stored ones: {resources}")
+                resources = []
+            live_status = {resource.get("vmid"): resource.get("status") for resource in resources}
+            
+            # One description line per VM instead of a field each
+            description = "\n".join(
+                _FMT_VM_LINE({
+                    **vm,
+                    "emoji": "🟢" if live_status.get(vm["vm_id"], vm["status"]) == "running" else "🔴",
+                    "ip_address": vm.get("ip_address", "Not assigned")
+                })
+                for vm in vms[:VM_LIST_LIMIT]
+            )
             embed = discord.Embed(
                 title="🖥️ Your Virtual Machines",
+                description=description,
                 color=0x0099ff,
-                timestamp=datetime.utcnow()
+                timestamp=discord.utils.utcnow()
             )
             
-            for vm in vms[:10]:  # Limit to 10 VMs
-                status_emoji = "🟢" if vm["status"] == "running" else "🔴"
-                embed.add_field(
-                    name=f"{status_emoji} {vm['name']} (ID: {vm['vm_id']})",
-                    value=f"**Template:** {vm['template']}\n"
-                          f"**Resources:** {vm['memory']}MB RAM, {vm['cores']} cores, {vm['disk_size']}GB disk\n"
-                          f"**Node:** {vm['node']}\n"
-                          f"**IP:** {vm.get('ip_address', 'Not assigned')}",
-                    inline=False
-                )
-                
-            if len(vms) > 10:
-                embed.set_footer(text=f"Showing 10 of {len(vms)} VMs")
+            if len(vms) > VM_LIST_LIMIT:
+                embed.set_footer(text=f"Showing {VM_LIST_LIMIT} of {len(vms)} VMs")
                 
             await interaction.followup.send(embed=embed)
             
@@ -173,22 +422,24 @@ class VMManagementCog(commands.Cog):
         await interaction.response.defer()
         
         try:
-            # Check if user owns this VM
-            vm = await self.bot.database.get_vm_by_id(vmid)
-            if not vm or vm["owner_id"] != interaction.user.id:
-                await interaction.followup.send("❌ VM not found or you don't own it.")
-                return
+            async with self._vm_lock(vmid):
+                # Check if user owns this VM
+                vm = await self.bot.vm_cache.get_vm(vmid)
+                if not vm or vm["owner_id"] != interaction.user.id:
+                    await interaction.followup.send("❌ VM not found or you don't own it.")
+                    return
+                    
+                # Start VM
+                result = await self.bot.proxmox.start_vm(vm["node"], vmid)
+                
+                # Update status in database
+                await self.bot.database.update_vm_status(vmid, "running")
+                await self.bot.vm_cache.invalidate_vm(vmid)
                 
-            # Start VM
-            result = await self.bot.proxmox.start_vm(vm["node"], vmid)
-            
-            # Update status in database
-            await self.bot.database.update_vm_status(vmid, "running")
-            
             embed = discord.Embed(
                 title="✅ VM Started",
                 color=0x00ff00,
-                timestamp=datetime.utcnow()
+                timestamp=discord.utils.utcnow()
             )
             embed.add_field(name="VM", value=f"{vm['name']} (ID: {vmid})", inline=False)
             embed.add_field(name="Node", value=vm["node"], inline=True)
@@ -207,22 +458,24 @@ class VMManagementCog(commands.Cog):
         await interaction.response.defer()
         
         try:
-            # Check if user owns this VM
-            vm = await self.bot.database.get_vm_by_id(vmid)
-            if not vm or vm["owner_id"] != interaction.user.id:
-                await interaction.followup.send("❌ VM not found or you don't own it.")
-                return
+            async with self._vm_lock(vmid):
+                # Check if user owns this VM
+                vm = await self.bot.vm_cache.get_vm(vmid)
+                if not vm or vm["owner_id"] != interaction.user.id:
+                    await interaction.followup.send("❌ VM not found or you don't own it.")
+                    return
+                    
+                # Stop VM
+                result = await self.bot.proxmox.stop_vm(vm["node"], vmid)
+                
+                # Update status in database
+                await self.bot.database.update_vm_status(vmid, "stopped")
+                await self.bot.vm_cache.invalidate_vm(vmid)
                 
-            # Stop VM
-            result = await self.bot.proxmox.stop_vm(vm["node"], vmid)
-            
-            # Update status in database
-            await self.bot.database.update_vm_status(vmid, "stopped")
-            
             embed = discord.Embed(
                 title="✅ VM Stopped",
                 color=0xff9900,
-                timestamp=datetime.utcnow()
+                timestamp=discord.utils.utcnow()
             )
             embed.add_field(name="VM", value=f"{vm['name']} (ID: {vmid})", inline=False)
             embed.add_field(name="Node", value=vm["node"], inline=True)
@@ -241,19 +494,20 @@ class VMManagementCog(commands.Cog):
         await interaction.response.defer()
         
         try:
-            # Check if user owns this VM
-            vm = await self.bot.database.get_vm_by_id(vmid)
-            if not vm or vm["owner_id"] != interaction.user.id:
-                await interaction.followup.send("❌ VM not found or you don't own it.")
-                return
+            async with self._vm_lock(vmid):
+                # Check if user owns this VM
+                vm = await self.bot.vm_cache.get_vm(vmid)
+                if not vm or vm["owner_id"] != interaction.user.id:
+                    await interaction.followup.send("❌ VM not found or you don't own it.")
+                    return
+                    
+                # Reboot VM
+                result = await self.bot.proxmox.reboot_vm(vm["node"], vmid)
                 
-            # Reboot VM
-            result = await self.bot.proxmox.reboot_vm(vm["node"], vmid)
-            
             embed = discord.Embed(
                 title="✅ VM Rebooted",
                 color=0x0099ff,
-                timestamp=datetime.utcnow()
+                timestamp=discord.utils.utcnow()
             )
             embed.add_field(name="VM", value=f"{vm['name']} (ID: {vmid})", inline=False)
             embed.add_field(name="Node", value=vm["node"], inline=True)
@@ -272,22 +526,24 @@ class VMManagementCog(commands.Cog):
         await interaction.response.defer()
         
         try:
-            # Check if user owns this VM
-            vm = await self.bot.database.get_vm_by_id(vmid)
-            if not vm or vm["owner_id"] != interaction.user.id:
-                await interaction.followup.send("❌ VM not found or you don't own it.")
-                return
+            async with self._vm_lock(vmid):
+                # Check if user owns this VM
+                vm = await self.bot.vm_cache.get_vm(vmid)
+                if not vm or vm["owner_id"] != interaction.user.id:
+                    await interaction.followup.send("❌ VM not found or you don't own it.")
+                    return
+                    
+                # Delete VM from Proxmox
+                result = await self.bot.proxmox.delete_vm(vm["node"], vmid)
+                
+                # Delete from database
+                await self.bot.database.delete_vm(vmid)
+                await self.bot.vm_cache.invalidate_vm(vmid)
                 
-            # Delete VM from Proxmox
-            result = await self.bot.proxmox.delete_vm(vm["node"], vmid)
-            
-            # Delete from database
-            await self.bot.database.delete_vm(vmid)
-            
             embed = discord.Embed(
                 title="✅ VM Deleted",
                 color=0xff0000,
-                timestamp=datetime.utcnow()
+                timestamp=discord.utils.utcnow()
             )
             embed.add_field(name="VM", value=f"{vm['name']} (ID: {vmid})", inline=False)
             embed.add_field(name="Node", value=vm["node"], inline=True)
@@ -306,44 +562,47 @@ class VMManagementCog(commands.Cog):
         
         try:
             # Check if user owns this VM
-            vm = await self.bot.database.get_vm_by_id(vmid)
+            vm = await self.bot.vm_cache.get_vm(vmid)
             if not vm or vm["owner_id"] != interaction.user.id:
                 await interaction.followup.send("❌ VM not found or you don't own it.")
                 return
                 
-            # Get current status from Proxmox
-            status = await self.bot.proxmox.get_vm_status(vm["node"], vmid)
-            config = await self.bot.proxmox.get_vm_config(vm["node"], vmid)
-            
-            embed = discord.Embed(
-                title=f"🖥️ {vm['name']} Information",
-                color=0x0099ff,
-                timestamp=datetime.utcnow()
+            # Get current status and config from Proxmox concurrently
+            status, config = await asyncio.gather(
+                self.bot.proxmox.get_vm_status(vm["node"], vmid),
+                self.bot.proxmox.get_vm_config(vm["node"], vmid),
+                return_exceptions=True
             )
-            
-            embed.add_field(name="VM ID", value=str(vmid), inline=True)
-            embed.add_field(name="Status", value=status.get("status", "Unknown"), inline=True)
-            embed.add_field(name="Node", value=vm["node"], inline=True)
-            embed.add_field(name="Template", value=vm["template"], inline=True)
-            embed.add_field(name="Memory", value=f"{vm['memory']} MB", inline=True)
-            embed.add_field(name="CPU Cores", value=str(vm["cores"]), inline=True)
-            embed.add_field(name="Disk Size", value=f"{vm['disk_size']} GB", inline=True)
-            embed.add_field(name="IP Address", value=vm.get("ip_address", "Not assigned"), inline=True)
-            embed.add_field(name="MAC Address", value=vm.get("mac_address", "Not assigned"), inline=True)
-            embed.add_field(name="Created", value=vm["created_at"].strftime("%Y-%m-%d %H:%M:%S"), inline=True)
-            embed.add_field(name="Last Modified", value=vm["last_modified"].strftime("%Y-%m-%d %H:%M:%S"), inline=True)
+            if isinstance(status, Exception):
+                logger.warning(f"Failed to get status for VM {vmid}: {status}")
+                status = {}
+            if isinstance(config, Exception):
+                logger.warning(f"Failed to get config for VM {vmid}: {config}")
+                config = {}
+                
+            description = _FMT_VM_INFO({
+                **vm,
+                "vm_id": vmid,
+                "status": status.get("status", "Unknown"),
+                "ip_address": vm.get("ip_address", "Not assigned"),
+                "mac_address": vm.get("mac_address", "Not assigned")
+            })
             
             if status.get("uptime"):
                 uptime_seconds = status["uptime"]
-                uptime_days = uptime_seconds // 86400
-                uptime_hours = (uptime_seconds % 86400) // 3600
-                uptime_minutes = (uptime_seconds % 3600) // 60
-                embed.add_field(
-                    name="Uptime",
-                    value=f"{uptime_days}d {uptime_hours}h {uptime_minutes}m",
-                    inline=True
+                description += _FMT_UPTIME(
+                    uptime_seconds // 86400,
+                    (uptime_seconds % 86400) // 3600,
+                    (uptime_seconds % 3600) // 60
                 )
                 
+            embed = discord.Embed(
+                title=f"🖥️ {vm['name']} Information",
+                description=description,
+                color=0x0099ff,
+                timestamp=discord.utils.utcnow()
+            )
+            
             await interaction.followup.send(embed=embed)
             
         except Exception as e:
@@ -367,53 +626,56 @@ class VMManagementCog(commands.Cog):
         await interaction.response.defer()
         
         try:
-            # Check if user owns this VM
-            vm = await self.bot.database.get_vm_by_id(vmid)
-            if not vm or vm["owner_id"] != interaction.user.id:
-                await interaction.followup.send("❌ VM not found or you don't own it.")
-                return
+            async with self._vm_lock(vmid):
+                # Check if user owns this VM
+                vm = await self.bot.vm_cache.get_vm(vmid)
+                if not vm or vm["owner_id"] != interaction.user.id:
+                    await interaction.followup.send("❌ VM not found or you don't own it.")
+                    return
+                    
+                # Get next VM ID if not provided
+                if not new_vmid:
+                    new_vmid = await self.bot.proxmox.get_next_vmid()
+                    
+                # Clone VM
+                clone_config = {
+                    "full": 1,  # Full clone
+                    "storage": vm["storage"]
+                }
                 
-            # Get next VM ID if not provided
-            if not new_vmid:
-                new_vmid = await self.bot.proxmox.get_next_vmid()
+                result = await self.bot.proxmox.clone_vm(
+                    vm["node"], vmid, new_vmid, new_name, clone_config
+                )
+                
+                # Store clone in database
+                clone_data = {
+                    "vm_id": new_vmid,
+                    "name": new_name,
+                    "template": vm["template"],
+                    "memory": vm["memory"],
+                    "cores": vm["cores"],
+                    "disk_size": vm["disk_size"],
+                    "node": vm["node"],
+                    "storage": vm["storage"],
+                    "network_bridge": vm["network_bridge"],
+                    "proxmox_config": vm["proxmox_config"]
+                }
+                
+                await self.bot.database.create_vm(interaction.user.id, clone_data)
+                self.bot.vm_cache.invalidate_user(interaction.user.id)
                 
-            # Clone VM
-            clone_config = {
-                "full": 1,  # Full clone
-                "storage": vm["storage"]
-            }
-            
-            result = await self.bot.proxmox.clone_vm(
-                vm["node"], vmid, new_vmid, new_name, clone_config
-            )
-            
-            # Store clone in database
-            clone_data = {
-                "vm_id": new_vmid,
-                "name": new_name,
-                "template": vm["template"],
-                "memory": vm["memory"],
-                "cores": vm["cores"],
-                "disk_size": vm["disk_size"],
-                "node": vm["node"],
-                "storage": vm["storage"],
-                "network_bridge": vm["network_bridge"],
-                "proxmox_config": vm["proxmox_config"]
-            }
-            
-            await self.bot.database.create_vm(interaction.user.id, clone_data)
-            
             embed = discord.Embed(
                 title="✅ VM Cloned Successfully",
                 color=0x00ff00,
-                timestamp=datetime.utcnow()
+                timestamp=discord.utils.utcnow()
             )
             embed.add_field(name="Original VM", value=f"{vm['name']} (ID: {vmid})", inline=True)
             embed.add_field(name="Cloned VM", value=f"{new_name} (ID: {new_vmid})", inline=True)
             embed.add_field(name="Node", value=vm["node"], inline=True)
-            embed.add_field(name="Status", value="Stopped", inline=True)
+            embed.add_field(name="Status", value="Cloning...", inline=True)
             
             await interaction.followup.send(embed=embed)
+            self._watch_task(interaction, vm["node"], result, f"Cloning {vm['name']} to {new_name} ({new_vmid})")
             
         except Exception as e:
             logger.error(f"Error cloning VM: {e}")
@@ -434,27 +696,29 @@ class VMManagementCog(commands.Cog):
         await interaction.response.defer()
         
         try:
-            # Check if user owns this VM
-            vm = await self.bot.database.get_vm_by_id(vmid)
-            if not vm or vm["owner_id"] != interaction.user.id:
-                await interaction.followup.send("❌ VM not found or you don't own it.")
-                return
+            async with self._vm_lock(vmid):
+                # Check if user owns this VM
+                vm = await self.bot.vm_cache.get_vm(vmid)
+                if not vm or vm["owner_id"] != interaction.user.id:
+                    await interaction.followup.send("❌ VM not found or you don't own it.")
+                    return
+                    
+                if new_size <= vm["disk_size"]:
+                    await interaction.followup.send("❌ New size must be larger than current size.")
+                    return
+                    
+                # Resize disk
+                disk = f"{vm['storage']}:vm-{vmid}-disk-0"
+                result = await self.bot.proxmox.resize_disk(vm["node"], vmid, disk, f"{new_size}G")
                 
-            if new_size <= vm["disk_size"]:
-                await interaction.followup.send("❌ New size must be larger than current size.")
-                return
+                # Update database
+                await self.bot.database.update_vm_disk_size(vmid, new_size)
+                await self.bot.vm_cache.invalidate_vm(vmid)
                 
-            # Resize disk
-            disk = f"{vm['storage']}:vm-{vmid}-disk-0"
-            result = await self.bot.proxmox.resize_disk(vm["node"], vmid, disk, f"{new_size}G")
-            
-            # Update database
-            await self.bot.database.update_vm_disk_size(vmid, new_size)
-            
             embed = discord.Embed(
                 title="✅ VM Disk Resized",
                 color=0x00ff00,
-                timestamp=datetime.utcnow()
+                timestamp=discord.utils.utcnow()
             )
             embed.add_field(name="VM", value=f"{vm['name']} (ID: {vmid})", inline=True)
             embed.add_field(name="Old Size", value=f"{vm['disk_size']} GB", inline=True)
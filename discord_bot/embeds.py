@@ -0,0 +1,64 @@
+"""
+Shared embed helpers for VPS Deployer Discord Bot
+"""
+import discord
+from typing import Any, Dict, List
+
+# Discord limits on one embed, and on the embeds and their total text per message
+MAX_EMBED_FIELDS = 25
+MAX_EMBED_DESCRIPTION = 4096
+MAX_FIELD_VALUE = 1024
+MAX_MESSAGE_EMBEDS = 10
+MAX_MESSAGE_EMBED_CHARS = 6000
+
+# Multipliers converting bytes to GB and MB
+BYTES_TO_GB = 1 / (1 << 30)
+BYTES_TO_MB = 1 / (1 << 20)
+
+def new_embed(template: Dict[str, Any], **overrides: Any) -> discord.Embed:
+    """Start an embed from a prebuilt payload, stamped with the current time"""
+    return discord.Embed.from_dict({**template, **overrides, "timestamp": discord.utils.utcnow().isoformat()})
+
+def build_embed(title: str, color: int, fields: List[Dict[str, Any]]) -> discord.Embed:
+    """Build an embed from prebuilt field dicts in one pass"""
+    return new_embed({"title": title, "color": color}, fields=fields)
+
+def build_embeds(title: str, color: int, fields: List[Dict[str, Any]]) -> List[discord.Embed]:
+    """Split fields over as many embeds as the per-embed field limit requires"""
+    if not fields:
+        return [build_embed(title, color, fields)]
+    return [
+        build_embed(title, color, fields[i:i + MAX_EMBED_FIELDS])
+        for i in range(0, len(fields), MAX_EMBED_FIELDS)
+    ]
+
+def description_embeds(template: Dict[str, Any], entries: List[str]) -> List[discord.Embed]:
+    """Lay out list entries as embed descriptions, starting a new embed when one fills up"""
+    embeds = []
+    chunk = []
+    size = 0
+    for entry in entries:
+        entry = entry[:MAX_EMBED_DESCRIPTION]
+        if chunk and size + len(entry) > MAX_EMBED_DESCRIPTION:
+            embeds.append(new_embed(template, description="\n\n".join(chunk)))
+            chunk = []
+            size = 0
+        chunk.append(entry)
+        size += len(entry) + 2
+    embeds.append(new_embed(template, description="\n\n".join(chunk)))
+    return embeds
+
+async def send_embeds(interaction: discord.Interaction, embeds: List[discord.Embed]):
+    """Send embeds packed into as few followup messages as Discord allows"""
+    batch = []
+    batch_size = 0
+    for embed in embeds:
+        size = len(embed)
+        if batch and (len(batch) == MAX_MESSAGE_EMBEDS or batch_size + size > MAX_MESSAGE_EMBED_CHARS):
+            await interaction.followup.send(embeds=batch)
+            batch = []
+            batch_size = 0
+        batch.append(embed)
+        batch_size += size
+        
+    await interaction.followup.send(embeds=batch)
\ No newline at end of file
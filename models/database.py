@@ -1,10 +1,10 @@
 """
 Database models for VPS Deployer Discord Bot
 """
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from datetime import datetime
 import uuid
 
@@ -30,6 +30,10 @@ class User(Base):
 class VM(Base):
     """Virtual Machine model"""
     __tablename__ = "vms"
+    __table_args__ = (
+        # Per-user listings, optionally filtered by status
+        Index("ix_vms_owner_status", "owner_id", "status"),
+    )
     
     id = Column(Integer, primary_key=True)
     vm_id = Column(Integer, unique=True, nullable=False, index=True)  # Proxmox VM ID
@@ -51,7 +55,7 @@ class VM(Base):
     node = Column(String(50), nullable=False)
     storage = Column(String(50), nullable=False)
     network_bridge = Column(String(50), default="vmbr0")
-    proxmox_config = Column(JSON)  # Store full Proxmox config
+    proxmox_config = Column(JSONB)  # Store full Proxmox config
     
     # Relationships
     owner = relationship("User", back_populates="vms")
@@ -88,7 +92,7 @@ class Deployment(Base):
     vm_id = Column(Integer, ForeignKey("vms.id"), nullable=True)
     
     # Deployment specific data
-    deployment_data = Column(JSON)
+    deployment_data = Column(JSONB)
     
     # Relationships
     user = relationship("User", back_populates="deployments")
@@ -112,7 +116,7 @@ class Template(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Template metadata
-    metadata = Column(JSON)
+    template_metadata = Column("metadata", JSONB)  # "metadata" is reserved on declarative models
 
 class Node(Base):
     """Proxmox Node model"""
@@ -129,11 +133,16 @@ class Node(Base):
     last_updated = Column(DateTime, default=datetime.utcnow)
     
     # Node specific data
-    node_data = Column(JSON)
+    node_data = Column(JSONB)
 
 class Backup(Base):
     """Backup model"""
     __tablename__ = "backups"
+    __table_args__ = (
+        # Append-only, so created_at follows the physical row order and a
+        # BRIN index serves time range scans at a fraction of a B-tree's size
+        Index("ix_backups_created_at_brin", "created_at", postgresql_using="brin", postgresql_with={"pages_per_range": 32}),
+    )
     
     id = Column(Integer, primary_key=True)
     backup_id = Column(String(100), unique=True, nullable=False)
@@ -146,7 +155,7 @@ class Backup(Base):
     retention_until = Column(DateTime)
     
     # Backup specific data
-    backup_data = Column(JSON)
+    backup_data = Column(JSONB)
     
     # Relationships
     vm = relationship("VM")
@@ -154,13 +163,17 @@ class Backup(Base):
 class AuditLog(Base):
     """Audit log for tracking all actions"""
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        # Append-only like backups; BRIN index for time range scans
+        Index("ix_audit_logs_created_at_brin", "created_at", postgresql_using="brin", postgresql_with={"pages_per_range": 32}),
+    )
     
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     action = Column(String(100), nullable=False)
     resource_type = Column(String(50), nullable=False)
     resource_id = Column(String(100))
-    details = Column(JSON)
+    details = Column(JSONB)
     ip_address = Column(String(45))
     user_agent = Column(String(500))
     created_at = Column(DateTime, default=datetime.utcnow)
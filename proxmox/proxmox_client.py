@@ -3,15 +3,55 @@ Proxmox API client for VPS Deployer Discord Bot
 """
 import asyncio
 import aiohttp
+import random
 import ssl
-from typing import Dict, List, Optional, Any, Tuple
-from proxmoxer import ProxmoxAPI
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Dict, FrozenSet, Iterator, List, Optional, Any, Set, Tuple
 import logging
 from datetime import datetime, timedelta
-import json
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# Proxmox tickets are valid for two hours; renew well before expiry
+TICKET_REFRESH_INTERVAL = 5400
+# Failed renewals are retried this soon so the current ticket does not lapse
+TICKET_RETRY_INTERVAL = 60
+
+# Total time in seconds allowed for one API request
+REQUEST_TIMEOUT = 30
+
+# Reads failing with these statuses or a network error are retried after a
+# jittered exponential backoff, or after the server's Retry-After
+RETRY_STATUSES = frozenset({502, 503, 504, 596})
+REQUEST_RETRIES = 3
+RETRY_BASE_DELAY = 0.1
+RETRY_MAX_DELAY = 5
+
+# Lifetimes in seconds of cached read-only API responses
+NODES_CACHE_TTL = 30
+NODE_CACHE_TTL = 5
+STATS_CACHE_TTL = 5
+CONFIG_CACHE_TTL = 30
+
+# Expired responses are still served for this long when Proxmox is unreachable
+STALE_CACHE_MAX_AGE = 600
+
+# Seconds between sweeps dropping responses too old to be served stale
+CACHE_SWEEP_INTERVAL = 60
+
+# Keys served stale within the current track_stale() block; a shared set so
+# tasks started inside the block report into it too
+_stale_keys: ContextVar[Optional[Set[str]]] = ContextVar("stale_keys", default=None)
+
+def _retry_delay(attempt: int, retry_after: Optional[str]) -> float:
+    """Seconds to wait before retrying a failed request"""
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), RETRY_MAX_DELAY)
+    return random.uniform(0, RETRY_BASE_DELAY * 2 ** attempt)
+
 class ProxmoxClient:
     """Advanced Proxmox API client with async support"""
     
@@ -21,10 +61,18 @@ class ProxmoxClient:
         self.password = password
         self.realm = realm
         self.verify_ssl = verify_ssl
-        self.api = None
         self.session = None
         self._auth_ticket = None
         self._auth_csrf = None
+        self._read_headers: Dict[str, str] = {}
+        self._write_headers: Dict[str, str] = {}
+        self._refresh_task = None
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._next_sweep = 0.0
+        self._node_names: Optional[Tuple[List[Dict], FrozenSet[str]]] = None
+        self._vm_ids: Optional[Tuple[List[Dict], FrozenSet[int]]] = None
+        self._template_volids: Dict[str, Tuple[List[Dict], FrozenSet[str]]] = {}
         
     async def __aenter__(self):
         """Async context manager entry"""
@@ -37,6 +85,9 @@ class ProxmoxClient:
         
     async def connect(self):
         """Connect to Proxmox API"""
+        if self.session and not self.session.closed:
+            return
+            
         try:
             # Create SSL context
             ssl_context = ssl.create_default_context()
@@ -44,20 +95,28 @@ class ProxmoxClient:
                 ssl_context.check_hostname = False
                 ssl_context.verify_mode = ssl.CERT_NONE
                 
-            # Create aiohttp session
-            connector = aiohttp.TCPConnector(ssl=ssl_context)
-            self.session = aiohttp.ClientSession(connector=connector)
+            # Create a long-lived aiohttp session with keep-alive connections
+            # and cached DNS lookups; all traffic goes to the one API host
+            connector = aiohttp.TCPConnector(
+                ssl=ssl_context,
+                limit=32,
+                limit_per_host=32,
+                keepalive_timeout=120,
+                ttl_dns_cache=300,
+                enable_cleanup_closed=True
+            )
+            self.session = aiohttp.ClientSession(
+                base_url=f"https://{self.host}:8006",
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+                headers={"Accept-Encoding": "gzip, deflate"},
+                auto_decompress=True,
+                json_serialize=lambda obj: orjson.dumps(obj).decode()
+            )
             
-            # Authenticate
+            # Authenticate once and renew the ticket in the background
             await self._authenticate()
-            
-            # Initialize ProxmoxAPI
-            self.api = ProxmoxAPI(
-                self.host,
-                user=f"{self.user}@{self.realm}",
-                password=self.password,
-                verify_ssl=self.verify_ssl
-            )
+            self._refresh_task = asyncio.create_task(self._refresh_ticket_loop())
             
             logger.info(f"Connected to Proxmox at {self.host}")
             
@@ -67,13 +126,29 @@ class ProxmoxClient:
             
     async def disconnect(self):
         """Disconnect from Proxmox API"""
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+            
         if self.session:
             await self.session.close()
             
+    async def _refresh_ticket_loop(self):
+        """Periodically renew the authentication ticket"""
+        delay = TICKET_REFRESH_INTERVAL
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self._authenticate()
+                delay = TICKET_REFRESH_INTERVAL
+            except Exception as e:
+                logger.warning(f"Failed to refresh Proxmox ticket, retrying in {TICKET_RETRY_INTERVAL}s: {e}")
+                delay = TICKET_RETRY_INTERVAL
+                
     async def _authenticate(self):
         """Authenticate with Proxmox API"""
         try:
-            auth_url = f"https://{self.host}:8006/api2/json/access/ticket"
+            auth_url = "/api2/json/access/ticket"
             auth_data = {
                 "username": f"{self.user}@{self.realm}",
                 "password": self.password
@@ -81,9 +156,14 @@ class ProxmoxClient:
             
             async with self.session.post(auth_url, data=auth_data) as response:
                 if response.status == 200:
-                    auth_result = await response.json()
+                    auth_result = orjson.loads(await response.read())
                     self._auth_ticket = auth_result["data"]["ticket"]
                     self._auth_csrf = auth_result["data"]["CSRFPreventionToken"]
+                    # Password logins authenticate with the ticket cookie; Proxmox
+                    # only wants the CSRF token on state-changing requests. New
+                    # dicts are swapped in so requests never see a half update
+                    self._read_headers = {"Cookie": f"PVEAuthCookie={self._auth_ticket}"}
+                    self._write_headers = {**self._read_headers, "CSRFPreventionToken": self._auth_csrf}
                     logger.info("Successfully authenticated with Proxmox")
                 else:
                     raise Exception(f"Authentication failed: {response.status}")
@@ -97,73 +177,181 @@ class ProxmoxClient:
         if not self.session:
             raise Exception("Not connected to Proxmox")
             
-        url = f"https://{self.host}:8006/api2/json/{endpoint}"
-        headers = {
-            "Authorization": f"PVEAPIToken={self._auth_ticket}",
-            "CSRFPreventionToken": self._auth_csrf
-        }
+        url = f"/api2/json/{endpoint}"
+        headers = self._read_headers if method == "GET" else self._write_headers
         
+        # Only reads are retried; repeating a write could apply it twice
+        attempts = 1 + REQUEST_RETRIES if method == "GET" else 1
         try:
-            async with self.session.request(method, url, headers=headers, json=data) as response:
-                result = await response.json()
-                
-                if response.status == 200:
-                    return result
-                else:
-                    error_msg = result.get("errors", {}).get("message", "Unknown error")
-                    raise Exception(f"API request failed: {error_msg}")
+            for attempt in range(attempts):
+                try:
+                    async with self.session.request(method, url, headers=headers, json=data) as response:
+                        if response.status in RETRY_STATUSES and attempt + 1 < attempts:
+                            delay = _retry_delay(attempt, response.headers.get("Retry-After"))
+                        else:
+                            result = orjson.loads(await response.read())
+                            
+                            if response.status == 200:
+                                if method != "GET":
+                                    self._invalidate(endpoint)
+                                return result
+                            else:
+                                error_msg = result.get("errors", {}).get("message", "Unknown error")
+                                raise Exception(f"API request failed: {error_msg}")
+                                
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    if attempt + 1 == attempts:
+                        raise
+                    delay = _retry_delay(attempt, None)
                     
+                logger.warning(f"Retrying {method} {endpoint} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                
         except Exception as e:
             logger.error(f"API request error: {e}")
             raise
             
+    async def _cached(self, key: str, ttl: float, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Return a cached response, fetching it on a miss"""
+        now = time.monotonic()
+        entry = self._cache.get(key)
+        if entry and entry[0] > now:
+            return entry[1]
+            
+        try:
+            value = await self._single_flight(key, fetch)
+        except Exception as e:
+            # Fall back to the last good response during short API outages
+            if entry and now - entry[0] < STALE_CACHE_MAX_AGE:
+                logger.warning(f"Serving stale response for {key}: {e}")
+                stale = _stale_keys.get()
+                if stale is not None:
+                    stale.add(key)
+                return entry[1]
+            raise
+            
+        now = time.monotonic()
+        self._cache[key] = (now + ttl, value)
+        if now >= self._next_sweep:
+            self._sweep(now)
+        return value
+        
+    def _sweep(self, now: float):
+        """Drop cached responses too old to be served even as a fallback"""
+        for key in [key for key, entry in self._cache.items() if now - entry[0] >= STALE_CACHE_MAX_AGE]:
+            del self._cache[key]
+        self._next_sweep = now + CACHE_SWEEP_INTERVAL
+        
+    def _invalidate(self, endpoint: str):
+        """Drop cached responses a write to an endpoint may have changed"""
+        # A write under nodes/{node}/{kind} affects that node's {kind} listings
+        # and the cluster-wide resource view
+        prefixes = ("cluster/resources",)
+        parts = endpoint.split("/", 3)
+        if parts[0] == "nodes" and len(parts) > 2:
+            prefixes += ("/".join(parts[:3]),)
+        for key in [key for key in self._cache if key.startswith(prefixes)]:
+            del self._cache[key]
+            
+    @contextmanager
+    def track_stale(self) -> Iterator[Set[str]]:
+        """Collect the keys of responses served stale by calls made within the block"""
+        stale: Set[str] = set()
+        token = _stale_keys.set(stale)
+        try:
+            yield stale
+        finally:
+            _stale_keys.reset(token)
+            
+    async def _single_flight(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fetch once for all concurrent callers of the same key"""
+        future = self._inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+            
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception retrieved in case nobody else was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[key]
+            
+    async def _get_data(self, endpoint: str, default: Any) -> Any:
+        """GET an endpoint and return its data payload"""
+        result = await self._make_request("GET", endpoint)
+        return result.get("data", default)
+        
+    async def _get_coalesced(self, endpoint: str, default: Any) -> Any:
+        """GET an uncached endpoint, sharing one request among concurrent callers"""
+        return await self._single_flight(endpoint, lambda: self._get_data(endpoint, default))
+        
     # Node Management
     async def get_nodes(self) -> List[Dict]:
         """Get all Proxmox nodes"""
-        result = await self._make_request("GET", "nodes")
-        return result.get("data", [])
+        return await self._cached("nodes", NODES_CACHE_TTL, lambda: self._get_data("nodes", []))
+        
+    async def get_node_name_set(self) -> FrozenSet[str]:
+        """Get the names of all Proxmox nodes"""
+        nodes = await self.get_nodes()
+        # Rebuild the set only when the cached node list has been refreshed
+        if self._node_names is None or self._node_names[0] is not nodes:
+            self._node_names = (nodes, frozenset(node["node"] for node in nodes))
+        return self._node_names[1]
         
     async def get_node_status(self, node: str) -> Dict:
         """Get node status and resources"""
-        result = await self._make_request("GET", f"nodes/{node}/status")
-        return result.get("data", {})
+        endpoint = f"nodes/{node}/status"
+        return await self._cached(endpoint, NODE_CACHE_TTL, lambda: self._get_data(endpoint, {}))
         
     async def get_node_resources(self, node: str) -> Dict:
         """Get node resource usage"""
-        result = await self._make_request("GET", f"nodes/{node}/rrddata?timeframe=hour")
-        return result.get("data", {})
+        endpoint = f"nodes/{node}/rrddata?timeframe=hour"
+        return await self._cached(endpoint, NODE_CACHE_TTL, lambda: self._get_data(endpoint, {}))
+        
+    async def get_cluster_resources(self, resource_type: Optional[str] = None) -> List[Dict]:
+        """Get status and usage of all cluster resources, optionally of one type"""
+        endpoint = f"cluster/resources?type={resource_type}" if resource_type else "cluster/resources"
+        return await self._cached(endpoint, NODE_CACHE_TTL, lambda: self._get_data(endpoint, []))
         
     # VM Management
     async def get_vms(self, node: Optional[str] = None) -> List[Dict]:
         """Get all VMs or VMs from specific node"""
         if node:
-            result = await self._make_request("GET", f"nodes/{node}/qemu")
+            endpoint = f"nodes/{node}/qemu"
+            return await self._cached(endpoint, NODE_CACHE_TTL, lambda: self._get_data(endpoint, []))
         else:
-            # Get VMs from all nodes
+            # Get VMs from all nodes concurrently
             nodes = await self.get_nodes()
+            node_names = [node_info["node"] for node_info in nodes]
+            results = await asyncio.gather(*(self.get_vms(node_name) for node_name in node_names), return_exceptions=True)
+            
             all_vms = []
-            for node_info in nodes:
-                node_name = node_info["node"]
-                try:
-                    vms = await self._make_request("GET", f"nodes/{node_name}/qemu")
-                    for vm in vms.get("data", []):
-                        vm["node"] = node_name
-                        all_vms.append(vm)
-                except Exception as e:
-                    logger.warning(f"Failed to get VMs from node {node_name}: {e}")
+            for node_name, vms in zip(node_names, results):
+                if isinstance(vms, Exception):
+                    logger.warning(f"Failed to get VMs from node {node_name}: {vms}")
+                    continue
+                # Copy the cached per-node entries rather than mutating them
+                all_vms.extend({**vm, "node": node_name} for vm in vms)
             return all_vms
-            
-        return result.get("data", [])
         
     async def get_vm_config(self, node: str, vmid: int) -> Dict:
         """Get VM configuration"""
-        result = await self._make_request("GET", f"nodes/{node}/qemu/{vmid}/config")
-        return result.get("data", {})
+        return await self._get_coalesced(f"nodes/{node}/qemu/{vmid}/config", {})
         
     async def get_vm_status(self, node: str, vmid: int) -> Dict:
         """Get VM status"""
-        result = await self._make_request("GET", f"nodes/{node}/qemu/{vmid}/status/current")
-        return result.get("data", {})
+        return await self._get_coalesced(f"nodes/{node}/qemu/{vmid}/status/current", {})
         
     async def create_vm(self, node: str, vmid: int, config: Dict) -> Dict:
         """Create a new VM"""
@@ -241,8 +429,7 @@ class ProxmoxClient:
         
     async def get_snapshots(self, node: str, vmid: int) -> List[Dict]:
         """Get VM snapshots"""
-        result = await self._make_request("GET", f"nodes/{node}/qemu/{vmid}/snapshot")
-        return result.get("data", [])
+        return await self._get_coalesced(f"nodes/{node}/qemu/{vmid}/snapshot", [])
         
     async def restore_snapshot(self, node: str, vmid: int, snapname: str) -> Dict:
         """Restore VM from snapshot"""
@@ -262,35 +449,47 @@ class ProxmoxClient:
         
     async def get_backups(self, node: str, vmid: int) -> List[Dict]:
         """Get VM backups"""
-        result = await self._make_request("GET", f"nodes/{node}/qemu/{vmid}/vzdump")
-        return result.get("data", [])
+        return await self._get_coalesced(f"nodes/{node}/qemu/{vmid}/vzdump", [])
         
     # Storage Management
     async def get_storage(self, node: str) -> List[Dict]:
         """Get storage information"""
-        result = await self._make_request("GET", f"nodes/{node}/storage")
-        return result.get("data", [])
+        endpoint = f"nodes/{node}/storage"
+        return await self._cached(endpoint, CONFIG_CACHE_TTL, lambda: self._get_data(endpoint, []))
         
     async def get_storage_content(self, node: str, storage: str) -> List[Dict]:
         """Get storage content"""
-        result = await self._make_request("GET", f"nodes/{node}/storage/{storage}/content")
-        return result.get("data", [])
+        return await self._get_coalesced(f"nodes/{node}/storage/{storage}/content", [])
         
     # Network Management
     async def get_networks(self, node: str) -> List[Dict]:
         """Get network interfaces"""
-        result = await self._make_request("GET", f"nodes/{node}/network")
-        return result.get("data", [])
+        endpoint = f"nodes/{node}/network"
+        return await self._cached(endpoint, CONFIG_CACHE_TTL, lambda: self._get_data(endpoint, []))
         
     # Template Management
     async def get_templates(self, node: str, storage: str) -> List[Dict]:
         """Get available templates"""
-        result = await self._make_request("GET", f"nodes/{node}/storage/{storage}/content")
-        templates = []
-        for item in result.get("data", []):
-            if item.get("content") == "vztmpl":
-                templates.append(item)
-        return templates
+        endpoint = f"nodes/{node}/storage/{storage}/content?content=vztmpl"
+        
+        async def fetch():
+            content = await self._get_data(endpoint, [])
+            return [item for item in content if item.get("content") == "vztmpl"]
+            
+        return await self._cached(endpoint, CONFIG_CACHE_TTL, fetch)
+        
+    async def get_template_volids(self, node: str, storage: str) -> FrozenSet[str]:
+        """Get the volume IDs of the templates available on a node's storage"""
+        templates = await self.get_templates(node, storage)
+        key = f"{node}/{storage}"
+        # Rebuild the set only when the cached template list has been refreshed
+        entry = self._template_volids.get(key)
+        if entry is None or entry[0] is not templates:
+            entry = self._template_volids[key] = (
+                templates,
+                frozenset(template["volid"] for template in templates if "volid" in template)
+            )
+        return entry[1]
         
     async def download_template(self, node: str, storage: str, template: str) -> Dict:
         """Download template to storage"""
@@ -304,13 +503,17 @@ class ProxmoxClient:
     # Monitoring and Statistics
     async def get_vm_stats(self, node: str, vmid: int) -> Dict:
         """Get VM statistics"""
-        result = await self._make_request("GET", f"nodes/{node}/qemu/{vmid}/rrddata?timeframe=hour")
-        return result.get("data", {})
+        endpoint = f"nodes/{node}/qemu/{vmid}/rrddata?timeframe=hour"
+        return await self._cached(endpoint, STATS_CACHE_TTL, lambda: self._get_data(endpoint, {}))
         
     async def get_node_stats(self, node: str) -> Dict:
         """Get node statistics"""
-        result = await self._make_request("GET", f"nodes/{node}/rrddata?timeframe=hour")
-        return result.get("data", {})
+        return await self._get_coalesced(f"nodes/{node}/rrddata?timeframe=hour", {})
+        
+    # Tasks
+    async def get_task_status(self, node: str, upid: str) -> Dict:
+        """Get the status of a Proxmox task; not cached since callers poll it"""
+        return await self._get_data(f"nodes/{node}/tasks/{upid}/status", {})
         
     # Console Access
     async def get_vnc_info(self, node: str, vmid: int) -> Dict:
@@ -331,25 +534,19 @@ class ProxmoxClient:
         
     async def check_vmid_exists(self, vmid: int) -> bool:
         """Check if VM ID exists"""
-        try:
-            nodes = await self.get_nodes()
-            for node_info in nodes:
-                node_name = node_info["node"]
-                vms = await self.get_vms(node_name)
-                for vm in vms:
-                    if vm["vmid"] == vmid:
-                        return True
-            return False
-        except:
-            return False
-            
+        # One cluster-wide listing instead of a request per node. Errors are
+        # raised rather than read as "free", which could hand out a used ID;
+        # that includes a stale fallback listing, which misses recent VMs
+        with self.track_stale() as stale:
+            vms = await self.get_cluster_resources("vm")
+        if stale:
+            raise Exception("Cannot check VM ID: Proxmox is unreachable and only a stale VM listing is cached")
+        # Rebuild the set only when the cached VM listing has been refreshed
+        if self._vm_ids is None or self._vm_ids[0] is not vms:
+            self._vm_ids = (vms, frozenset(vm["vmid"] for vm in vms))
+        return vmid in self._vm_ids[1]
+        
     async def get_vm_by_name(self, name: str) -> Optional[Dict]:
         """Get VM by name"""
-        try:
-            vms = await self.get_vms()
-            for vm in vms:
-                if vm.get("name") == name:
-                    return vm
-            return None
-        except:
-            return None
\ No newline at end of file
+        vms = await self.get_cluster_resources("vm")
+        return next((vm for vm in vms if vm.get("name") == name), None)
\ No newline at end of file
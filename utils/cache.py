@@ -0,0 +1,183 @@
+"""
+Redis-backed caches for VPS Deployer Discord Bot
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+import orjson
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+# Cache lifetimes in seconds
+VM_TTL = 30
+BACKUPS_TTL = 10
+USER_TTL = 20
+
+# Most per-user VM and deployment lists kept in process
+USER_INDEX_SIZE = 1024
+
+# VM record fields stored as ISO strings and restored on read
+_DATETIME_FIELDS = ("created_at", "last_modified")
+
+def _encode(value: Any) -> bytes:
+    """Serialize a value for Redis, writing datetimes as ISO strings with only the offset they carry (none for naive DB timestamps)"""
+    return orjson.dumps(value, default=str)
+
+def _decode_vm(raw: bytes) -> Dict[str, Any]:
+    """Deserialize a cached VM record"""
+    vm = orjson.loads(raw)
+    for field in _DATETIME_FIELDS:
+        if isinstance(vm.get(field), str):
+            vm[field] = datetime.fromisoformat(vm[field])
+    return vm
+
+class VMCache:
+    """Read-through cache for VM records and Proxmox backup listings"""
+    
+    def __init__(self, redis: Redis, database, proxmox):
+        self.redis = redis
+        self.database = database
+        self.proxmox = proxmox
+        # In-process vmid -> (expires_at, record) index in front of Redis
+        self._vm_index: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+        self._vm_loads: Dict[int, asyncio.Task] = {}
+        # In-process (kind, user_id) -> (expires_at, rows) index of per-user lists
+        self._user_index: Dict[Tuple[str, int], Tuple[float, List[Dict[str, Any]]]] = {}
+        self._vm_owners: Dict[int, int] = {}
+        
+    async def _get(self, key: str) -> Optional[bytes]:
+        """Read a key, treating Redis failures as a cache miss"""
+        try:
+            return await self.redis.get(key)
+        except RedisError as e:
+            logger.warning(f"Cache read failed for {key}: {e}")
+            return None
+            
+    async def _set(self, key: str, value: bytes, ttl: int):
+        """Write a key with a TTL, ignoring Redis failures"""
+        try:
+            await self.redis.set(key, value, ex=ttl)
+        except RedisError as e:
+            logger.warning(f"Cache write failed for {key}: {e}")
+            
+    async def _delete(self, *keys: str):
+        """Delete keys, ignoring Redis failures"""
+        try:
+            await self.redis.delete(*keys)
+        except RedisError as e:
+            logger.warning(f"Cache invalidation failed for {keys}: {e}")
+            
+    # VM records
+    async def get_vm(self, vmid: int) -> Optional[Dict[str, Any]]:
+        """Get a VM record from the in-process index, loading it on a miss"""
+        entry = self._vm_index.get(vmid)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+            
+        # Concurrent misses for the same VM share one load
+        task = self._vm_loads.get(vmid)
+        if task is None:
+            task = asyncio.create_task(self._load_vm(vmid))
+            self._vm_loads[vmid] = task
+            task.add_done_callback(lambda _: self._vm_loads.pop(vmid, None))
+            
+        vm = await asyncio.shield(task)
+        if vm:
+            self._vm_index[vmid] = (time.monotonic() + VM_TTL, vm)
+        return vm
+        
+    async def _load_vm(self, vmid: int) -> Optional[Dict[str, Any]]:
+        """Load a VM record from Redis, falling back to the database"""
+        key = f"vm:{vmid}"
+        raw = await self._get(key)
+        if raw is not None:
+            return _decode_vm(raw)
+            
+        vm = await self.database.get_vm_by_id(vmid)
+        if vm:
+            vm = dict(vm)
+            await self._set(key, _encode(vm), VM_TTL)
+        return vm
+        
+    async def invalidate_vm(self, vmid: int):
+        """Drop a cached VM record after it changes"""
+        self._vm_index.pop(vmid, None)
+        owner = self._vm_owners.pop(vmid, None)
+        if owner is not None:
+            self.invalidate_user(owner)
+        await self._delete(f"vm:{vmid}")
+        
+    # Per-user lists
+    async def _get_user_rows(
+        self,
+        kind: str,
+        user_id: int,
+        load: Callable[[int], Awaitable[List[Dict[str, Any]]]]
+    ) -> List[Dict[str, Any]]:
+        """Get a per-user list from the in-process index, loading it on a miss"""
+        key = (kind, user_id)
+        entry = self._user_index.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+            
+        rows = await load(user_id)
+        if len(self._user_index) >= USER_INDEX_SIZE:
+            # Drop the oldest entry (dicts keep insertion order)
+            self._user_index.pop(next(iter(self._user_index)))
+        self._user_index[key] = (time.monotonic() + USER_TTL, rows)
+        return rows
+        
+    async def _load_user_vms(self, user_id: int) -> List[Dict[str, Any]]:
+        """Load a user's VMs, remembering the owner of each for invalidation"""
+        vms = await self.database.get_user_vms(user_id)
+        for vm in vms:
+            self._vm_owners[vm["vm_id"]] = user_id
+        return vms
+        
+    async def get_user_vms(self, user_id: int) -> List[Dict[str, Any]]:
+        """Get the VMs of a user"""
+        return await self._get_user_rows("vms", user_id, self._load_user_vms)
+        
+    async def get_user_deployments(self, user_id: int) -> List[Dict[str, Any]]:
+        """Get the deployments of a user"""
+        return await self._get_user_rows("deployments", user_id, self.database.get_user_deployments)
+        
+    def invalidate_user(self, user_id: int):
+        """Drop a user's cached lists after their VMs or deployments change"""
+        self._user_index.pop(("vms", user_id), None)
+        self._user_index.pop(("deployments", user_id), None)
+        
+    # Backups
+    async def _get_backup_entry(self, node: str, vmid: int) -> Dict[str, Any]:
+        """Get the cached backup listing together with its volid set"""
+        key = f"backups:{node}:{vmid}"
+        raw = await self._get(key)
+        if raw is not None:
+            return orjson.loads(raw)
+            
+        backups = await self.proxmox.get_backups(node, vmid)
+        entry = {
+            "backups": backups,
+            "volids": [backup["volid"] for backup in backups if "volid" in backup]
+        }
+        await self._set(key, _encode(entry), BACKUPS_TTL)
+        return entry
+        
+    async def get_backups(self, node: str, vmid: int) -> List[Dict[str, Any]]:
+        """Get the backups of a VM"""
+        entry = await self._get_backup_entry(node, vmid)
+        return entry["backups"]
+        
+    async def get_backup_volids(self, node: str, vmid: int) -> FrozenSet[str]:
+        """Get the volume IDs of a VM's backups for membership tests"""
+        entry = await self._get_backup_entry(node, vmid)
+        return frozenset(entry["volids"])
+        
+    async def invalidate_backups(self, node: str, vmid: int):
+        """Drop a cached backup listing after backups are added or removed"""
+        await self._delete(f"backups:{node}:{vmid}")